@@ -0,0 +1,111 @@
+"""Batched arc and circle generation for airspace boundaries"""
+import math
+from functools import lru_cache
+import numpy as np
+from pyproj import Geod
+
+# pyproj uses the same geodesic algorithms (Karney) as geographiclib, generated points agree with
+# Geodesic.WGS84.Direct to better than 1 mm
+WGS84 = Geod(ellps="WGS84")
+
+# convert nautical miles to meters
+NM = 1852
+
+# default maximum distance (m) between a chord and the true arc, well below anything visible on a radar client
+ARC_TOLERANCE = 10
+
+# even on very small circles, don't step more than this many degrees at once
+MAX_STEP = 10.0
+
+def arc_step(radius, tolerance=ARC_TOLERANCE):
+    """Return the largest bearing step (degrees) that keeps every chord within tolerance (m) of an arc of the
+    given radius (m). A tolerance of None or 0 gives the original fixed 1 degree step"""
+    if not tolerance:
+        return 1.0
+    if tolerance >= radius:
+        return MAX_STEP
+
+    # the sagitta of a chord subtending angle a is r(1 - cos(a/2))
+    step = math.degrees(2 * math.acos(1 - tolerance / radius))
+    return min(step, MAX_STEP)
+
+def arc_sweep(start_brg, end_brg, direction):
+    """Return the number of degrees an arc turns through. Direction is 1 for clockwise, 2 for anti-clockwise
+    and 3 for a circle"""
+    if direction == 3:
+        return 360.0
+    elif direction == 1:
+        return (end_brg - start_brg) % 360
+    elif direction == 2:
+        return (start_brg - end_brg) % 360
+    raise ValueError(f"{direction} is not a valid arc direction")
+
+def arc_bearings(start_brg, end_brg, direction, step=1.0):
+    """Return every bearing along an arc, from the start bearing up to but not including the end bearing.
+    Direction is 1 for clockwise, 2 for anti-clockwise and 3 for a circle"""
+    start_brg = start_brg % 360
+    sweep = arc_sweep(start_brg, end_brg % 360, direction)
+
+    # the number of steps is worked out up front so the arc always ends, whatever the rounding of the bearings
+    points = int(np.ceil(round(sweep / step, 9)))
+    offsets = np.arange(points) * step
+    if direction == 2:
+        offsets = -offsets
+
+    return (start_brg + offsets) % 360
+
+def generate_arc(center_lat, center_lon, start_lat, start_lon, end_lat, end_lon, direction, dst=2.5, tolerance=ARC_TOLERANCE):
+    """Return arrays of latitude and longitude along an arc. Direction is 1 for clockwise, 2 for anti-clockwise
+    and 3 for a circle of radius dst (NM) about the centre. The number of points is chosen so no chord is further
+    than tolerance (m) from the arc, a tolerance of None or 0 steps every 1 degree"""
+    if direction == 3:
+        start_brg = 0
+        end_brg = 0
+        radius = dst * NM
+    else:
+        # centre point to start and end in one call
+        azimuths, back_azimuths, distances = WGS84.inv(
+            [center_lon, center_lon], [center_lat, center_lat],
+            [start_lon, end_lon], [start_lat, end_lat]
+            )
+        start_brg = azimuths[0]
+        end_brg = azimuths[1]
+        radius = distances[0]
+
+    # round the key slightly so the same arc worked out from slightly different inputs is still a cache hit
+    return arc_points(
+        round(float(center_lat), 9),
+        round(float(center_lon), 9),
+        round(float(radius), 3),
+        round(float(start_brg) % 360, 6),
+        round(float(end_brg) % 360, 6),
+        direction,
+        tolerance
+        )
+
+@lru_cache(maxsize=4096)
+def arc_points(center_lat, center_lon, radius, start_brg, end_brg, direction, tolerance):
+    """Return the latitude and longitude arrays of an arc, memoised as many airspaces share the same circle"""
+    step = arc_step(radius, tolerance)
+    if tolerance:
+        # spread the points evenly over the arc rather than leaving a short step at the end
+        sweep = arc_sweep(start_brg % 360, end_brg % 360, direction)
+        if sweep > 0:
+            step = sweep / math.ceil(sweep / step)
+    bearings = arc_bearings(start_brg, end_brg, direction, step)
+    count = len(bearings)
+    lons, lats, back_azimuths = WGS84.fwd(
+        np.full(count, float(center_lon)),
+        np.full(count, float(center_lat)),
+        bearings,
+        np.full(count, float(radius))
+        )
+
+    # the arrays are shared between every caller of the cache so they can't be changed
+    lats.flags.writeable = False
+    lons.flags.writeable = False
+    return lats, lons
+
+def cache_info():
+    """Return the hit and miss counters of the arc cache"""
+    return arc_points.cache_info()
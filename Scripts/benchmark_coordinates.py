@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of the bulk coordinate functions against the original per-point functions, over the points of the
+scraped boundaries and every vertex in AirfieldGeoJson
+
+Run from the repository root: python Scripts/benchmark_coordinates.py
+"""
+import json
+import math
+import os
+import re
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import coordinates
+
+work_dir = os.getcwd()
+
+def legacy_sct_location_builder(lat, lon, lat_ns, lon_ew):
+    """Original Webscrape.sct_location_builder"""
+    lat_split = [char for char in lat]
+    if len(lat_split) > 6:
+        lat_print = f"{lat_ns}{lat_split[0]}{lat_split[1]}.{lat_split[2]}{lat_split[3]}.{lat_split[4]}{lat_split[5]}.{lat_split[7]}{lat_split[8]}"
+    else:
+        lat_print = f"{lat_ns}{lat_split[0]}{lat_split[1]}.{lat_split[2]}{lat_split[3]}.{lat_split[4]}{lat_split[5]}.00"
+
+    lon_split = [char for char in lon]
+    if len(lon_split) > 7:
+        lon_print = f"{lon_ew}{lon_split[0]}{lon_split[1]}{lon_split[2]}.{lon_split[3]}{lon_split[4]}.{lon_split[5]}{lon_split[6]}.{lon_split[8]}{lon_split[9]}"
+    else:
+        lon_print = f"{lon_ew}{lon_split[0]}{lon_split[1]}{lon_split[2]}.{lon_split[3]}{lon_split[4]}.{lon_split[5]}{lon_split[6]}.00"
+
+    return f"{lat_print} {lon_print}"
+
+def legacy_dms2dd(coord_group):
+    """Original Builder.run dms2dd"""
+    group_split = str(coord_group).split(" ")
+    lat = re.match(r"([N|S])([\d]{2})\.([\d]{2})\.([\d]{2})\.([\d]{2})", group_split[0])
+    lon = re.match(r"([E|W])([\d]{3})\.([\d]{2})\.([\d]{2})\.([\d]{2})", group_split[1])
+
+    lat_out = int(lat.group(2)) + int(lat.group(3)) / 60 + float(lat.group(4) + "." + lat.group(5)) / 3600
+    lon_out = int(lon.group(2)) + int(lon.group(3)) / 60 + float(lon.group(4) + "." + lon.group(5)) / 3600
+
+    if lat.group(1) == "S":
+        lat_out = lat_out - (lat_out * 2)
+    if lon.group(1) == "W":
+        lon_out = lon_out - (lon_out * 2)
+
+    return [lat_out, lon_out]
+
+def legacy_dd2dms(latitude, longitude):
+    """Original dd2dms"""
+    split_degx = math.modf(longitude)
+    degrees_x = int(split_degx[1])
+    minutes_x = abs(int(math.modf(split_degx[0] * 60)[1]))
+    seconds_x = abs(round(math.modf(split_degx[0] * 60)[0] * 60,2))
+
+    split_degy = math.modf(latitude)
+    degrees_y = int(split_degy[1])
+    minutes_y = abs(int(math.modf(split_degy[0] * 60)[1]))
+    seconds_y = abs(round(math.modf(split_degy[0] * 60)[0] * 60,2))
+
+    EorW = "W" if longitude < 0 else "E"
+    NorS = "S" if latitude < 0 else "N"
+
+    return (NorS + str(abs(round(degrees_y))).zfill(3) + "." + str(round(minutes_y)).zfill(2) + "." + str(seconds_y).zfill(3) + " " + EorW + str(abs(round(degrees_x))).zfill(3) + "." + str(round(minutes_x)).zfill(2) + "." + str(seconds_x).zfill(3))
+
+def load_points():
+    """Every SCT formatted point in the scraped boundaries"""
+    points = []
+    for file in ["Enr021-FIR.csv", "Enr021-CTA.csv", "Enr021-TMA.csv", "Enr051.csv", "AccUac.csv"]:
+        df = pd.read_csv(f"Dataframes/{file}", index_col=0)
+        for boundary in df['boundary'].dropna():
+            points.extend(boundary.split('/'))
+    # the builder's dms2dd only reads the two digit latitude layout, and a handful of eAIP points have 60+ minutes
+    # or seconds which the bulk functions normalise rather than copy through
+    valid = r"[N|S][\d]{2}\.[0-5][\d]\.[0-5][\d]\.[\d]{2} [E|W][\d]{3}\.[0-5][\d]\.[0-5][\d]\.[\d]{2}$"
+    return [p for p in points if re.match(valid, p)]
+
+def load_geojson_points():
+    """Every vertex of every feature in the AirfieldGeoJson files, as lists of latitude and longitude"""
+    lat = []
+    lon = []
+
+    def walk(coords):
+        if coords and isinstance(coords[0], (int, float)):
+            lat.append(float(coords[1]))
+            lon.append(float(coords[0]))
+        else:
+            for coord in coords:
+                walk(coord)
+
+    for file in sorted(os.listdir("AirfieldGeoJson")):
+        with open(os.path.join("AirfieldGeoJson", file)) as read_file:
+            for feature in json.load(read_file)['features']:
+                walk(feature['geometry']['coordinates'])
+    return lat, lon
+
+def run(name, legacy, bulk, repeat=3):
+    """Time both versions and print the speed up"""
+    legacy_time = min(timeit.repeat(legacy, number=1, repeat=repeat))
+    bulk_time = min(timeit.repeat(bulk, number=1, repeat=repeat))
+    print(f"{name:<24}{legacy_time * 1000:>10.1f} ms{bulk_time * 1000:>10.1f} ms{legacy_time / bulk_time:>8.1f}x")
+
+if __name__ == "__main__":
+    points = load_points()
+    dd = coordinates.sct_to_dd(points)
+    lat = dd[:, 0]
+    lon = dd[:, 1]
+    lat_list = lat.tolist()
+    lon_list = lon.tolist()
+
+    # eAIP text for the same points
+    aip = [(p[1:3] + p[4:6] + p[7:9] + p[9:12], p[14:17] + p[18:20] + p[21:23] + p[23:26], p[0], p[13]) for p in points]
+    aip_lat, aip_lon, aip_ns, aip_ew = (list(x) for x in zip(*aip))
+
+    # check both versions give the same answers before timing them
+    assert np.allclose(dd, [legacy_dms2dd(p) for p in points], rtol=0, atol=1e-12)
+    assert coordinates.format_dms(lat, lon) == [legacy_dd2dms(y, x) for y, x in zip(lat_list, lon_list)]
+    assert coordinates.aip_to_sct(aip_lat, aip_lon, aip_ns, aip_ew) == [legacy_sct_location_builder(*a) for a in aip]
+
+    # every vertex of the airfield ground layouts, which osm_data_parse formats
+    geo_lat_list, geo_lon_list = load_geojson_points()
+    geo_lat = np.array(geo_lat_list)
+    geo_lon = np.array(geo_lon_list)
+    assert coordinates.format_dms(geo_lat, geo_lon) == [legacy_dd2dms(y, x) for y, x in zip(geo_lat_list, geo_lon_list)]
+
+    print(f"{len(points)} points, {len(geo_lat_list)} GeoJSON points")
+    print(f"{'':<24}{'per-point':>13}{'bulk':>13}")
+    run("SCT text to dd", lambda: [legacy_dms2dd(p) for p in points], lambda: coordinates.sct_to_dd(points))
+    run("dd to dd2dms text", lambda: [legacy_dd2dms(y, x) for y, x in zip(lat_list, lon_list)], lambda: coordinates.format_dms(lat, lon))
+    run("GeoJSON to dd2dms text", lambda: [legacy_dd2dms(y, x) for y, x in zip(geo_lat_list, geo_lon_list)], lambda: coordinates.format_dms(geo_lat, geo_lon))
+    run("eAIP text to SCT text", lambda: [legacy_sct_location_builder(*a) for a in aip], lambda: coordinates.aip_to_sct(aip_lat, aip_lon, aip_ns, aip_ew))
@@ -0,0 +1,68 @@
+"""Batched runway extended centre line generation"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import coordinates
+from arcs import NM, WGS84
+
+# length and tick spacing (NM) of the centre line for any aerodrome not in the config file
+DEFAULT_LENGTH = 2
+DEFAULT_SPACING = 1
+
+# distance (m) from the centre line to each end of a tick
+TICK_WIDTH = 200
+
+def load_config(filename):
+    """Returns the per aerodrome centre line length and tick spacing, indexed by ICAO designator"""
+    if not os.path.exists(filename):
+        return pd.DataFrame(columns=['length', 'spacing'], index=pd.Index([], name='icao_designator'))
+    return pd.read_csv(filename, index_col='icao_designator')
+
+def runway_settings(icao, config):
+    """Returns arrays of centre line length and tick spacing for each runway"""
+    settings = config.reindex(icao)
+    length = settings['length'].fillna(DEFAULT_LENGTH).to_numpy(dtype=np.float64)
+    spacing = settings['spacing'].fillna(DEFAULT_SPACING).to_numpy(dtype=np.float64)
+    return length, spacing
+
+def generate_centerlines(location, bearing, length, spacing, tick_width=TICK_WIDTH):
+    """Generate the extended centre lines for many runways at once.
+    Takes the threshold of each runway as SCT text, its bearing and the centre line length and tick spacing (NM).
+    Returns the start of each centre line and a list of ticks for each runway, formatted in the dd2dms layout"""
+    points = coordinates.sct_to_dd(location)
+    lat = points[:, 0]
+    lon = points[:, 1]
+    bearing = np.asarray(bearing, dtype=np.float64)
+    length = np.asarray(length, dtype=np.float64)
+    spacing = np.asarray(spacing, dtype=np.float64)
+    back_bearing = (bearing + 180) % 360
+    right_angle = (bearing + 90) % 360
+    left_angle = (right_angle + 180) % 360
+
+    start_lon, start_lat, _ = WGS84.fwd(lon, lat, back_bearing, length * NM)
+
+    # a tick every spacing NM from the far end of the centre line down to the threshold
+    counts = np.floor(np.round(length / spacing, 9)).astype(np.int64) + 1
+    runway = np.repeat(np.arange(len(counts)), counts)
+    marker = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) * spacing[runway]
+    center_lon, center_lat, _ = WGS84.fwd(lon[runway], lat[runway], back_bearing[runway], (length[runway] - marker) * NM)
+    width = np.full(len(runway), float(tick_width))
+    left_lon, left_lat, _ = WGS84.fwd(center_lon, center_lat, right_angle[runway], width)
+    right_lon, right_lat, _ = WGS84.fwd(center_lon, center_lat, left_angle[runway], width)
+
+    starts = coordinates.format_dms(start_lat, start_lon)
+    lefts = coordinates.format_dms(left_lat, left_lon)
+    rights = coordinates.format_dms(right_lat, right_lon)
+    tick_text = [f"{left} {right}" for left, right in zip(lefts, rights)]
+    ends = np.cumsum(counts)
+    ticks = [tick_text[end - count:end] for end, count in zip(ends, counts)]
+    return starts, ticks
+
+def build_centerlines(runways, config, tick_width=TICK_WIDTH):
+    """Generate the centre lines of every runway in the AD-2 runways table"""
+    length, spacing = runway_settings(runways['icao_designator'], config)
+    location = runways['location'].tolist()
+    bearing = runways['bearing'].to_numpy(dtype=np.float64)
+    return generate_centerlines(location, bearing, length, spacing, tick_width)
@@ -0,0 +1,165 @@
+"""Shared coordinate conversions between eAIP text, decimal degrees and SCT text
+
+Points are kept as float64 arrays of decimal degrees and only formatted as text when they are written out.
+The bulk functions take arrays (or lists) of any length and return lists of strings; the single point
+functions are kept for callers that only ever deal with one point at a time.
+"""
+import re
+
+import numpy as np
+
+# character codes of N S E W, in that order
+HEMISPHERES = np.frombuffer(b"NSEW", dtype=np.uint8)
+
+# one SCT coordinate, only used to point out which coordinate couldn't be read
+SCT_COORD = re.compile(r"\s*[NS][\d]{1,3}\.[\d]{1,2}\.[\d]{1,2}(\.[\d]+)?\s+[EW][\d]{1,3}\.[\d]{1,2}\.[\d]{1,2}(\.[\d]+)?\s*")
+
+# a gap in a row of character codes, removed when the rows are joined into strings
+GAP = 0
+
+def _signed(values, hemispheres):
+    """Apply the sign for S or W to an array of absolute degrees"""
+    hemispheres = np.asarray(hemispheres, dtype=str)
+    return np.where(np.isin(hemispheres, ("S", "W")), -values, values)
+
+def _digits(values, width):
+    """Return the character codes of an integer array, zero padded to width"""
+    powers = 10 ** np.arange(width - 1, -1, -1)
+    return (values[:, None] // powers % 10 + ord("0")).astype(np.uint8)
+
+def _char(count, char):
+    """Return a column of one repeated character code"""
+    return np.full((count, 1), ord(char), dtype=np.uint8)
+
+def _strings(columns):
+    """Join columns of character codes into one string per row, leaving out any gaps"""
+    rows = np.hstack(columns + [_char(len(columns[0]), "\n")])
+    text = rows.tobytes().replace(bytes([GAP]), b"").decode("ascii")
+    return text.split("\n")[:-1]
+
+def aip_to_dd(values, hemispheres):
+    """Convert eAIP DDMMSS(.ss) / DDDMMSS(.ss) text with N/S/E/W to decimal degrees"""
+    values = np.asarray(values, dtype=np.float64)
+    degrees = np.floor(values / 10000)
+    minutes = np.floor(values / 100) % 100
+    seconds = values - degrees * 10000 - minutes * 100
+    return _signed(degrees + minutes / 60 + seconds / 3600, hemispheres)
+
+def sct_to_dd(coords):
+    """Convert SCT coordinate text to an (n, 2) array of latitude and longitude. Takes either
+    'N57.12.14.80 W002.12.05.88' or the dd2dms layout 'N057.14.38.67 W002.11.53.0'"""
+    coords = [str(c) for c in coords]
+    text = np.frombuffer(" ".join(coords).encode("ascii"), dtype=np.uint8)
+    digit = (text >= ord("0")) & (text <= ord("9"))
+    letter = np.isin(text, HEMISPHERES)
+
+    # every run of digits is one number, read all of them at once from their digits
+    start = digit & ~np.concatenate(([False], digit[:-1]))
+    first = np.flatnonzero(start)
+    positions = np.flatnonzero(digit)
+    number = (np.cumsum(start) - 1)[positions]
+    lengths = np.bincount(number, minlength=len(first))
+    exponent = lengths[number] - 1 - (positions - first[number])
+    values = np.bincount(number, weights=(text[positions] - ord("0")) * 10.0 ** exponent, minlength=len(first))
+
+    # each N/S/E/W starts half a coordinate, the numbers after it are degrees, minutes, seconds and decimals
+    half = np.cumsum(letter)[first] - 1
+    order = np.arange(len(first)) - np.searchsorted(half, half)
+    hemisphere = text[letter]
+    per_half = np.bincount(half[half >= 0], minlength=len(hemisphere))
+    if (len(hemisphere) != 2 * len(coords)) or (half.min(initial=0) < 0) or (per_half.min(initial=3) < 3) or (per_half.max(initial=3) > 4) \
+            or not np.isin(hemisphere[0::2], HEMISPHERES[:2]).all() or not np.isin(hemisphere[1::2], HEMISPHERES[2:]).all():
+        bad = [c for c in coords if not SCT_COORD.fullmatch(c)]
+        raise ValueError(f"{bad[0] if bad else coords} is not a valid SCT coordinate")
+
+    parts = np.zeros((len(hemisphere), 4))
+    parts[half, order] = values
+    decimals = order == 3
+    parts[half[decimals], 3] = values[decimals] / 10.0 ** lengths[decimals]
+    degrees = parts[:, 0] + parts[:, 1] / 60 + (parts[:, 2] + parts[:, 3]) / 3600
+    degrees = np.where(np.isin(hemisphere, HEMISPHERES[1::2]), -degrees, degrees)
+    return degrees.reshape(len(coords), 2)
+
+def _sct_part(values, positive, negative, width):
+    """Character codes of decimal degrees as HDD.MM.SS.ss with the degrees padded to width"""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    count = len(values)
+    # work in whole hundredths of a second so the text never shows 59.999... or 60.00
+    total = np.rint(np.abs(values) * 360000).astype(np.int64)
+
+    # signbit keeps the hemisphere of points which are exactly on the equator or meridian (-0.0)
+    hemisphere = np.where(np.signbit(values), ord(negative), ord(positive)).astype(np.uint8)[:, None]
+    return [
+        hemisphere,
+        _digits(total // 360000, width), _char(count, "."),
+        _digits((total // 6000) % 60, 2), _char(count, "."),
+        _digits((total // 100) % 60, 2), _char(count, "."),
+        _digits(total % 100, 2)
+        ]
+
+def format_sct(lat, lon):
+    """Format arrays of latitude and longitude as SCT text - N57.12.14.80 W002.12.05.88"""
+    lat = _sct_part(lat, "N", "S", 2)
+    return _strings(lat + [_char(len(lat[0]), " ")] + _sct_part(lon, "E", "W", 3))
+
+def _round_hundredths(values):
+    """Return round(value, 2) * 100 as integers, matching Python's correctly rounded round()"""
+    scaled = values * 100
+    hundredths = np.rint(scaled)
+    # rint of the scaled value can disagree with round() when the value is right on a half, check those with Python
+    close = np.flatnonzero(np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6)
+    for i in close:
+        hundredths[i] = round(round(float(values[i]), 2) * 100)
+    return hundredths.astype(np.int64)
+
+def _dms_part(values, positive, negative):
+    """Character codes of decimal degrees in the dd2dms layout, with the seconds printed as Python prints
+    round(seconds, 2)"""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    count = len(values)
+    fraction, whole = np.modf(values)
+    degrees = np.abs(whole).astype(np.int64)
+    minute_fraction, minutes = np.modf(fraction * 60)
+    minutes = np.abs(minutes).astype(np.int64)
+    hundredths = _round_hundredths(np.abs(minute_fraction * 60))
+
+    # str() of a float rounded to 2 places has no leading zero and drops a trailing zero, but always keeps
+    # one digit either side of the decimal point
+    seconds = _digits(hundredths // 100, 2)
+    seconds[hundredths < 1000, 0] = GAP
+    decimals = _digits(hundredths % 100, 2)
+    decimals[hundredths % 10 == 0, 1] = GAP
+
+    hemisphere = np.where(values < 0, ord(negative), ord(positive)).astype(np.uint8)[:, None]
+    return [
+        hemisphere,
+        _digits(degrees, 3), _char(count, "."),
+        _digits(minutes, 2), _char(count, "."),
+        seconds, _char(count, "."),
+        decimals
+        ]
+
+def format_dms(lat, lon):
+    """Format arrays of latitude and longitude in the dd2dms layout - N057.14.38.67 W002.11.53.0"""
+    lat = _dms_part(lat, "N", "S")
+    return _strings(lat + [_char(len(lat[0]), " ")] + _dms_part(lon, "E", "W"))
+
+def aip_to_sct(lat, lon, lat_ns, lon_ew):
+    """Convert arrays of eAIP DDMMSS(.ss) / DDDMMSS(.ss) text to SCT text"""
+    return format_sct(aip_to_dd(lat, lat_ns), aip_to_dd(lon, lon_ew))
+
+def sct_location_builder(lat, lon, lat_ns, lon_ew):
+    """Returns an SCT file compliant location from a single eAIP coordinate"""
+    return aip_to_sct([lat], [lon], [lat_ns], [lon_ew])[0]
+
+def dms2dd(lat, lon, ns, ew):
+    """Convert a single eAIP coordinate to [lat, lon] decimal degrees"""
+    return [float(aip_to_dd([lat], [ns])[0]), float(aip_to_dd([lon], [ew])[0])]
+
+def dd2dms(latitude, longitude, dd_type=0):
+    """Convert a single point in decimal degrees to the dd2dms layout"""
+    return format_dms([latitude], [longitude])[0]
+
+def sct2dd(coord_group):
+    """Convert a single SCT coordinate to [lat, lon] decimal degrees - N57.12.14.80 W002.12.05.88"""
+    return sct_to_dd([coord_group])[0].tolist()
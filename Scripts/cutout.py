@@ -0,0 +1,267 @@
+"""Local SCT files cut out of the full FIR build
+
+A cut-out keeps the headers, section tags and RANGE lines, and only the features which intersect the area asked
+for - an aerodrome and a radius around it, a point and a radius or a bounding box. The airspace boundaries are picked
+with the spatial.AirspaceIndex over the parsed tables, and every line of each airspace which overlaps the area is kept.
+The rest of the lines which hold coordinates (GEO, runways, fixes, regions and labels) become features with a
+geometry in a tree of their own. Airways are placed from the VOR and fix positions in the same file and a kept airway
+keeps the fixes along it.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import LineString, Point, Polygon, box
+
+try:
+    from shapely import linestrings
+    from shapely import points as shapely_points
+except ImportError:
+    # Shapely 1.8 has no vectorised constructors, geometries are made one at a time
+    shapely_points = None
+
+import coordinates
+import spatial
+from arcs import NM, WGS84
+
+# radius (NM) around an aerodrome or point when none is given
+DEFAULT_RADIUS = 30
+
+# points used to draw the circle around an aerodrome or point
+CIRCLE_POINTS = 72
+
+# below this number of cut-outs it is quicker to write them all in one process
+PARALLEL_CUTOUTS = 8
+
+# one coordinate pair, in the SCT, dd2dms or FREETEXT (':' separated) layout
+COORD_PAIR = re.compile(r"[NS]\d{1,3}\.\d{1,2}\.\d{1,2}(?:\.\d+)?[ :][EW]\d{1,3}\.\d{1,2}\.\d{1,2}(?:\.\d+)?")
+
+# sections whose lines are a route of fix names rather than coordinates
+AIRWAY_SECTIONS = ("[LOW AIRWAY]", "[HIGH AIRWAY]")
+
+# sections whose features can be named in an airway
+FIX_SECTIONS = ("[VOR]", "[FIXES]")
+
+# section each airspace table is drawn in by the builder, each line there is named after its airspace
+TABLE_SECTIONS = {
+    "Enr021-FIR": "[ARTCC]",
+    "Enr021-TMA": "[ARTCC HIGH]",
+    "Enr021-CTA": "[ARTCC LOW]",
+    "Enr022-ATZ": "[ARTCC LOW]",
+    "Ad0217-ATS": "[ARTCC LOW]",
+    "Enr051": "[GEO]"
+    }
+
+def circle(lat, lon, radius):
+    """Returns a polygon of the points radius NM from lat, lon"""
+    bearings = np.linspace(0, 360, CIRCLE_POINTS, endpoint=False)
+    lons, lats, _ = WGS84.fwd(np.full(CIRCLE_POINTS, lon), np.full(CIRCLE_POINTS, lat), bearings, np.full(CIRCLE_POINTS, radius * NM))
+    return Polygon(zip(lons, lats))
+
+def airport_locations(df):
+    """Returns the [lat, lon] of every aerodrome in the AD-1 table, indexed by ICAO designator"""
+    # aerodromes without a published location are left out
+    df = df.loc[df['location'].astype(str).str.fullmatch(COORD_PAIR)]
+    points = coordinates.sct_to_dd(df['location'].tolist())
+    return dict(zip(df['icao_designator'], points.tolist()))
+
+def parse_area(spec, airports):
+    """Returns the name and polygon of an area given as ICAO, lat,lon or min_lat,min_lon,max_lat,max_lon. An
+    aerodrome or point can be followed by @radius (NM)"""
+    text, _, radius = spec.partition("@")
+    radius = float(radius) if radius else DEFAULT_RADIUS
+    values = text.split(",")
+    if len(values) == 4:
+        min_lat, min_lon, max_lat, max_lon = (float(value) for value in values)
+        return "_".join(values), box(min_lon, min_lat, max_lon, max_lat)
+    elif len(values) == 2:
+        lat, lon = (float(value) for value in values)
+        return "_".join(values), circle(lat, lon, radius)
+
+    icao = text.upper()
+    if icao not in airports:
+        raise ValueError(f"{spec} is not an aerodrome, a point or a bounding box")
+    lat, lon = airports[icao]
+    return icao, circle(lat, lon, radius)
+
+class SctIndex:
+    """The lines of a built SCT file split into blocks, with an STRtree over the blocks which are features. Airspace
+    lines are found through the airspace index instead, if one is given"""
+
+    def __init__(self, lines, airspace=None):
+        self.airspace = airspace
+        # (section, name) of every airspace in the index. Lines of an airspace the index doesn't hold, or whose name
+        # is shared by more than one volume, are placed by their own geometry like any other line
+        airspace_keys = set()
+        if airspace is not None:
+            keys = pd.Series([(TABLE_SECTIONS[table], name) for table, name in zip(airspace.volumes['table'], airspace.volumes['name']) if table in TABLE_SECTIONS], dtype=object)
+            airspace_keys = set(keys.loc[~keys.duplicated(keep=False)])
+        self.airspace_features = {} # (section, name) to the features drawing that airspace
+        self.blocks = []        # lines of each block, in file order
+        self.feature_block = [] # block of each feature
+        self.structure = []     # blocks which are always kept
+        coord_text = []         # coordinate pairs of every feature, in order
+        coord_feature = []      # feature each of those pairs belongs to
+        self.fix_feature = {}   # VOR or fix name to the feature placing it
+        routes = {}             # feature of an airway to the fix names along it
+        regions = set()         # features which are filled areas
+
+        section = None
+        pending = []            # comments waiting to see what follows them
+        current = None          # feature a REGIONS line adds to
+        for line in lines:
+            stripped = line.strip()
+            if not stripped:
+                # blank lines stay with whatever came before them
+                if pending:
+                    pending.append(line)
+                elif self.blocks:
+                    self.blocks[-1].append(line)
+                else:
+                    self.add_structure([line])
+                continue
+
+            pairs = COORD_PAIR.findall(line)
+            if stripped.startswith("["):
+                section = stripped
+                current = None
+                self.add_structure(pending + [line])
+                pending = []
+            elif stripped.startswith(";"):
+                pending.append(line)
+            elif stripped.startswith("RANGE") or (not pairs and section not in AIRWAY_SECTIONS + ("[REGIONS]",)):
+                self.add_structure(pending + [line])
+                pending = []
+            elif (section == "[REGIONS]") and pairs and (current is not None):
+                # the rest of the region after its name, a colour and the first point then a point on each line
+                self.blocks[-1].append(line)
+                coord_text.extend(pairs)
+                coord_feature.extend([current] * len(pairs))
+            else:
+                feature = self.add_feature(pending + [line])
+                pending = []
+                key = (section, line.split("\t")[0].strip())
+                if key in airspace_keys:
+                    self.airspace_features.setdefault(key, []).append(feature)
+                    continue
+                coord_text.extend(pairs)
+                coord_feature.extend([feature] * len(pairs))
+                if section == "[REGIONS]":
+                    current = feature
+                    regions.add(feature)
+                elif section in AIRWAY_SECTIONS:
+                    routes[feature] = [name.strip() for name in line.split("\t")[1:] if name.strip()]
+                elif section in FIX_SECTIONS:
+                    self.fix_feature[stripped.split()[0]] = feature
+        if pending:
+            self.add_structure(pending)
+
+        # every coordinate in the file is read in one go, then split up by feature
+        points = coordinates.sct_to_dd(coord_text)[:, ::-1] if coord_text else np.zeros((0, 2))
+        feature_points = [[] for _ in self.feature_block]
+        for feature, point in zip(coord_feature, points.tolist()):
+            feature_points[feature].append(point)
+        for feature, names in routes.items():
+            feature_points[feature] = [feature_points[self.fix_feature[name]][0] for name in names if name in self.fix_feature]
+        self.routes = {feature: [self.fix_feature[name] for name in names if name in self.fix_feature] for feature, names in routes.items()}
+
+        # an airway with none of its fixes in the file has nowhere to go, so it is never kept
+        self.geometry_feature = [feature for feature, feature_point in enumerate(feature_points) if feature_point]
+        self.geometries = self.build_geometries([feature_points[feature] for feature in self.geometry_feature], [feature in regions for feature in self.geometry_feature])
+        self.tree = spatial.GeometryTree(self.geometries)
+
+    @classmethod
+    def from_file(cls, filename, airspace=None):
+        with open(filename) as read_file:
+            return cls(read_file, airspace)
+
+    def add_structure(self, lines):
+        self.structure.append(len(self.blocks))
+        self.blocks.append(lines)
+
+    def add_feature(self, lines):
+        self.feature_block.append(len(self.blocks))
+        self.blocks.append(lines)
+        return len(self.feature_block) - 1
+
+    @classmethod
+    def build_geometries(cls, feature_points, region):
+        """Returns a geometry for each list of points, with Shapely 2 every point and line is made in one call"""
+        if shapely_points is None:
+            return [cls.geometry(points, filled) for points, filled in zip(feature_points, region)]
+
+        geometries = np.empty(len(feature_points), dtype=object)
+        counts = np.array([len(points) for points in feature_points], dtype=np.int64)
+        single = np.flatnonzero(counts == 1)
+        line = np.flatnonzero((counts > 1) & ~np.array(region, dtype=bool))
+        if len(single):
+            geometries[single] = shapely_points([feature_points[i][0] for i in single])
+        if len(line):
+            coords = [point for i in line for point in feature_points[i]]
+            geometries[line] = linestrings(coords, indices=np.repeat(np.arange(len(line)), counts[line]))
+        for i in np.flatnonzero((counts > 1) & np.array(region, dtype=bool)):
+            geometries[i] = cls.geometry(feature_points[i], True)
+        return list(geometries)
+
+    @staticmethod
+    def geometry(points, region=False):
+        if len(points) == 1:
+            return Point(points[0])
+        if region and (len(points) >= 3):
+            polygon = Polygon(points)
+            if polygon.is_valid:
+                return polygon
+        return LineString(points)
+
+    def features_in(self, area):
+        """Returns the features which intersect the area and the lines of every airspace which overlaps it, along with
+        the fixes of any airway among them"""
+        features = {self.geometry_feature[i] for i in self.tree.query(area) if self.geometries[i].intersects(area)}
+        if self.airspace is not None:
+            volumes = self.airspace.intersecting(area)
+            for table, name in zip(volumes['table'], volumes['name']):
+                features.update(self.airspace_features.get((TABLE_SECTIONS.get(table), name), []))
+        for feature in list(features):
+            features.update(self.routes.get(feature, []))
+        return features
+
+    def lines_in(self, area):
+        """Yields the lines of the SCT file which are kept in a cut-out of the area"""
+        blocks = set(self.structure)
+        blocks.update(self.feature_block[feature] for feature in self.features_in(area))
+        for block in sorted(blocks):
+            yield from self.blocks[block]
+
+    def write(self, area, filename):
+        with open(f"{filename}.tmp", "w", buffering=1024 * 1024) as write_file:
+            write_file.writelines(self.lines_in(area))
+        os.replace(f"{filename}.tmp", filename)
+        return filename
+
+_worker_index = None
+
+def _load_worker(sct_file, dataframes):
+    global _worker_index
+    _worker_index = SctIndex.from_file(sct_file, spatial.AirspaceIndex.load(dataframes) if dataframes else None)
+
+def _write_cutout(job):
+    return _worker_index.write(*job)
+
+def build_cutouts(sct_file, areas, directory, workers=None, parallel=PARALLEL_CUTOUTS, dataframes=None):
+    """Write a cut-out of the SCT file for each (name, polygon) in areas to directory/name.sct, the airspace is picked
+    with the index of the tables in dataframes if it is given. With more than parallel areas they are shared across a
+    process pool, each process reads the SCT file once"""
+    os.makedirs(directory, exist_ok=True)
+    # loaded here first so a stale index is rebuilt and saved once, not by every process
+    airspace = spatial.AirspaceIndex.load(dataframes) if dataframes else None
+    jobs = [(area, os.path.join(directory, f"{name}.sct")) for name, area in areas]
+    # more processes than cores only adds start up time
+    workers = min(workers or os.cpu_count() or 1, os.cpu_count() or 1, len(jobs))
+    if (len(jobs) <= parallel) or (workers < 2):
+        index = SctIndex.from_file(sct_file, airspace)
+        return [index.write(*job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker, initargs=(sct_file, dataframes)) as executor:
+        return list(executor.map(_write_cutout, jobs))
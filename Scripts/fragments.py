@@ -0,0 +1,72 @@
+"""Fragment cache shared by generate.py and osm_data_parse.py
+
+Each fragment is a file in the cache directory, listed in manifest.json with a fingerprint of what it was made from.
+A fragment is only made again when its fingerprint changes, or when the whole cache is rebuilt.
+"""
+import hashlib
+import json
+import os
+
+def code_version(*sources):
+    """Returns a hash of the given source files, so nothing cached by older code is reused"""
+    digest = hashlib.sha1()
+    for source in sources:
+        with open(source, "rb") as read_file:
+            digest.update(read_file.read())
+    return digest
+
+class FragmentCache:
+    """Fragments named name + suffix in directory, with the fingerprint of each in manifest.json"""
+
+    def __init__(self, directory, version, suffix, rebuild=False):
+        self.directory = directory
+        self.version = version
+        self.suffix = suffix
+        self.manifest_file = os.path.join(directory, "manifest.json")
+        self.manifest = {}
+        os.makedirs(directory, exist_ok=True)
+        if (not rebuild) and os.path.exists(self.manifest_file):
+            with open(self.manifest_file) as read_file:
+                self.manifest = json.load(read_file)
+
+    def fragment_file(self, name):
+        return os.path.join(self.directory, f"{name}{self.suffix}")
+
+    def fingerprint(self, inputs):
+        """Returns a hash of the version and the contents of every input file"""
+        digest = self.version.copy()
+        for filename in inputs:
+            if os.path.exists(filename):
+                with open(filename, "rb") as read_file:
+                    data = read_file.read()
+                digest.update(f"{len(data)}\0".encode())
+                digest.update(data)
+            else:
+                digest.update(b"-\0")
+        return digest.hexdigest()
+
+    def current(self, name, key):
+        """Returns True if the fragment is on disk and was made from inputs with this fingerprint"""
+        return (self.manifest.get(name) == key) and os.path.exists(self.fragment_file(name))
+
+    def write(self, name, key, writer, mode="w", buffering=-1):
+        """Make a fragment by calling writer with the open file, it only replaces the old one once it is complete"""
+        fragment_file = self.fragment_file(name)
+        with open(f"{fragment_file}.tmp", mode, buffering=buffering) as write_file:
+            writer(write_file)
+        os.replace(f"{fragment_file}.tmp", fragment_file)
+        self.manifest[name] = key
+        return fragment_file
+
+    def forget(self, keep):
+        """Remove every fragment which isn't named in keep"""
+        for name in set(self.manifest) - set(keep):
+            del self.manifest[name]
+            if os.path.exists(self.fragment_file(name)):
+                os.remove(self.fragment_file(name))
+
+    def save(self):
+        """Write the manifest, only once the fragments it describes are on disk"""
+        with open(f"{self.manifest_file}.tmp", "w") as write_file:
+            json.dump(self.manifest, write_file, indent=1, sort_keys=True)
+        os.replace(f"{self.manifest_file}.tmp", self.manifest_file)
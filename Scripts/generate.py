@@ -3,6 +3,8 @@ from asyncore import loop
 import math
 import datetime
 import argparse
+import gzip
+import hashlib
 from pkgutil import get_data
 import shutil
 from webbrowser import get
@@ -11,26 +13,125 @@ import urllib3
 import argparse
 import requests
 import re
+import io
 import os
+import pickle
 import pandas as pd
 import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from alive_progress import alive_bar
 from bs4 import BeautifulSoup
 from colorama import Fore, Style
+from collections import deque
 from datetime import date
-from geographiclib.geodesic import Geodesic
+from lxml import etree
+
+import arcs
+import centerlines
+import coordinates
+import cutout
+import fragments
+import storage
+from fragments import code_version
 
 work_dir = os.getcwd()
 
+# size of the write buffer for the SCT file, so it is written in large blocks rather than line by line
+SCT_BUFFER = 1024 * 1024
+
 # pandas init
-dfColumns = ['name', 'callsign', 'frequency', 'boundary', 'upper_fl', 'lower_fl', 'class']
-df_fir = pd.DataFrame(columns=dfColumns)
-df_uir = pd.DataFrame(columns=dfColumns)
-df_cta = pd.DataFrame(columns=dfColumns)
-df_tma = pd.DataFrame(columns=dfColumns)
-df_ctr = pd.DataFrame(columns=dfColumns)
-df_atz = pd.DataFrame(columns=dfColumns)
-dfEnr05 = pd.DataFrame(columns=dfColumns)
+dfColumns = ['name', 'callsign', 'frequency', 'boundary', 'upper_fl', 'upper_unit', 'lower_fl', 'lower_unit', 'class']
+
+# eAIP tags used by Webscrape.airspace_parser, compiled once so each token is classified in one search
+AIRSPACE_TOKENS = re.compile(
+    r"(?P<title>TAIRSPACE;TXT_NAME)"
+    r"|(?P<danger_area>TAIRSPACE;CODE_ID)"
+    r"|(?P<coords>TAIRSPACE_VERTEX;GEO_L(?:AT|ONG);[\d]{4})"
+    r"|(?P<lat_arc>TAIRSPACE_VERTEX;GEO_LAT_ARC)"
+    r"|(?P<lon_arc>TAIRSPACE_VERTEX;GEO_LONG_ARC)"
+    r"|(?P<arc>TAIRSPACE_VERTEX;VAL_RADIUS_ARC)"
+    r"|(?P<callsign>TUNIT;TXT_NAME)"
+    r"|(?P<freq>TFREQUENCY;VAL_FREQ_TRANS)"
+    r"|(?P<airspace_class>TAIRSPACE_LAYER_CLASS;CODE_CLASS)"
+    r"|(?P<upper_limit>TAIRSPACE_VOLUME;VAL_DIST_VER_UPPER)"
+    r"|(?P<lower_limit>TAIRSPACE_VOLUME;VAL_DIST_VER_LOWER)"
+    r"|(?P<upper_unit>TAIRSPACE_VOLUME;UOM_DIST_VER_UPPER)"
+    r"|(?P<lower_unit>TAIRSPACE_VOLUME;UOM_DIST_VER_LOWER)"
+)
+
+class TokenWindow:
+    """Sliding window over a stream of tokens, only the tokens either side of the current one are kept in memory"""
+
+    def __init__(self, tokens, behind=16):
+        self.tokens = iter(tokens)
+        self.behind = behind
+        self.buffer = deque()
+        self.start = 0 # index of the first token in the buffer
+        self.exhausted = False
+
+    def fill(self, index):
+        """Read tokens from the stream until the given index is in the buffer"""
+        while (not self.exhausted) and (self.start + len(self.buffer) <= index):
+            try:
+                self.buffer.append(next(self.tokens))
+            except StopIteration:
+                self.exhausted = True
+
+    def has(self, index):
+        """Move the window to the given index, returns False once the stream has run out"""
+        # drop anything which has fallen out of the back of the window
+        while self.buffer and (self.start < index - self.behind):
+            self.buffer.popleft()
+            self.start += 1
+        self.fill(index)
+        return index < self.start + len(self.buffer)
+
+    def __getitem__(self, index):
+        self.fill(index)
+        if (index < self.start) or (index >= self.start + len(self.buffer)):
+            return ""
+        return self.buffer[index - self.start]
+
+class RecordBuilder:
+    """Collects rows in a list and builds the dataframe once, rather than appending to a dataframe row by row"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.rows = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, rows):
+        """Add a row (dict) or a list of rows, None is ignored"""
+        if rows is None:
+            return
+        if isinstance(rows, dict):
+            self.rows.append(rows)
+        else:
+            self.rows.extend(rows)
+
+    def to_frame(self):
+        """Build the dataframe from all the rows collected"""
+        return pd.DataFrame(self.rows, columns=self.columns)
+
+class SectionCache(fragments.FragmentCache):
+    """Keeps each rendered SCT section on disk along with a fingerprint of the files it was built from, so a section
+    is only rendered again when one of those files changes"""
+
+    def __init__(self, directory, rebuild=False):
+        # the builder's own code is part of every fingerprint, so changing it renders every section again
+        super().__init__(directory, code_version(__file__, arcs.__file__, centerlines.__file__, coordinates.__file__, fragments.__file__, storage.__file__), ".sct", rebuild)
+        self.rendered = []
+
+    def fragment(self, name, render, inputs):
+        """Returns the file holding a rendered section, render is only called if the inputs have changed"""
+        key = self.fingerprint(inputs)
+        if not self.current(name, key):
+            self.write(name, key, lambda write_file: write_file.writelines(render()), buffering=SCT_BUFFER)
+            self.rendered.append(name)
+        return self.fragment_file(name)
 
 class Airac:
     """Class for general functions relating to AIRAC"""
@@ -62,6 +163,12 @@ class Airac:
         numberOfDays = numberOfCycles * self.cycleDays + 1
         return self.baseDate + datetime.timedelta(days=numberOfDays)
 
+    def previousCycle(self):
+        """Return the date of the previous AIRAC cycle"""
+        numberOfCycles = self.initialise()
+        numberOfDays = (numberOfCycles - 1) * self.cycleDays + 1
+        return self.baseDate + datetime.timedelta(days=numberOfDays)
+
     def nextCycle(self):
         """Return the date of the next AIRAC cycle"""
         numberOfCycles = self.initialise()
@@ -82,28 +189,204 @@ class Airac:
 class Webscrape:
     '''Class to scrape data from the given AIRAC eAIP URL'''
 
-    def __init__(self, next=0):
+    def __init__(self, next=0, workers=8, cache_dir="Cache", cache_cycles=3, arc_tolerance=arcs.ARC_TOLERANCE, arrow=False, diff=False):
         cycle = Airac()
         self.cycle = cycle.currentCycle()
+        self.previousCycle = cycle.previousCycle()
         self.cycleUrl = cycle.url()
         self.country = "EG"
+        self.arc_tolerance = arc_tolerance
+        self.arrow = arrow
+
+        # in diff mode pages which haven't changed since the previous cycle aren't parsed again, their results are
+        # carried forward from the parsed page cache
+        self.diff = diff and bool(cache_dir)
+        if diff and not cache_dir:
+            print(Fore.YELLOW + "Diff mode needs the page cache, every page will be parsed" + Style.RESET_ALL)
+        self.parser_version = code_version(__file__, arcs.__file__, coordinates.__file__)
+        self.parser_version.update(str(arc_tolerance).encode())
+        self.parser_version = self.parser_version.hexdigest()
+        self.page_changes = {"changed": [], "unchanged": [], "new": []}
+
+        # each AIRAC publication is immutable, so pages are cached on disk per cycle
+        self.cache_dir = cache_dir
+        self.cache_cycles = cache_cycles
+        if self.cache_dir:
+            self.prune_cache()
+
+        # one pooled session is kept for the whole run so connections are reused between pages
+        self.workers = workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pages = {}
+
+    def cache_file(self, uri):
+        """Return the cache file for the given page in this AIRAC cycle"""
+        key = hashlib.sha1((self.cycleUrl + uri).encode()).hexdigest()
+        return os.path.join(self.cache_dir, str(self.cycle), f"{key}.html.gz")
+
+    def prune_cache(self):
+        """Remove cached cycles which are older than the retention window, cache_cycles counts the current cycle"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        keep = max(self.cache_cycles, 1)
+        if self.diff:
+            # diff mode compares with the parsed pages saved in the previous cycle
+            keep = max(keep, 2)
+        oldest = self.cycle - datetime.timedelta(days=Airac().cycleDays * (keep - 1))
+        for folder in os.listdir(self.cache_dir):
+            try:
+                folder_date = date.fromisoformat(folder)
+            except ValueError:
+                continue
+            if folder_date < oldest:
+                print(f"Removing cached pages for AIRAC {folder}")
+                shutil.rmtree(os.path.join(self.cache_dir, folder))
+
+    def get_page(self, uri):
+        """Download the given page, returns the raw content or 404"""
+        if uri in self.pages:
+            return self.pages[uri]
+
+        cache_file = False
+        if self.cache_dir:
+            cache_file = self.cache_file(uri)
+            if os.path.exists(cache_file):
+                with gzip.open(cache_file, "rb") as read_file:
+                    content = read_file.read()
+                # a cached empty file marks a page which doesn't exist in this cycle
+                if content == b"":
+                    content = 404
+                self.pages[uri] = content
+                return content
+
+        page = self.session.get(self.cycleUrl + uri)
+        if (page.status_code == 404):
+            content = 404
+        else:
+            page.raise_for_status()
+            content = page.content
+
+        if cache_file:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            # write to a temp file first so a half written page is never served from the cache
+            with gzip.open(f"{cache_file}.tmp", "wb") as write_file:
+                write_file.write(b"" if content == 404 else content)
+            os.replace(f"{cache_file}.tmp", cache_file)
+
+        self.pages[uri] = content
+        return content
+
+    @staticmethod
+    def page_fingerprint(page):
+        """Returns a hash of the text of a page's headings and table rows. Markup, links and any text marked as
+        deleted by an amendment are left out, so the hash only changes when the content of the page does"""
+        if page == 404:
+            return "404"
+
+        def strings(element):
+            if "AmdtDeleted" in (element.get("class") or ""):
+                return
+            if element.text:
+                yield element.text
+            for child in element:
+                if isinstance(child.tag, str):
+                    yield from strings(child)
+                if child.tail:
+                    yield child.tail
+
+        digest = hashlib.sha1()
+        # streamed so the whole page is never held as a tree, only the heading or row being read
+        depth = 0
+        for event, element in etree.iterparse(io.BytesIO(page), events=("start", "end"), tag=("h3", "tr"), html=True):
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth:
+                # a row inside another row is read along with the outer one
+                continue
+            for row in element.iter("h3", "tr"):
+                for text in strings(row):
+                    text = text.strip()
+                    if text:
+                        digest.update(text.encode())
+                        digest.update(b"\0")
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return digest.hexdigest()
+
+    def parsed_file(self, cycle, uri):
+        """Return the file holding the parsed result of the given page in the given AIRAC cycle"""
+        key = hashlib.sha1(uri.encode()).hexdigest()
+        return os.path.join(self.cache_dir, str(cycle), "parsed", f"{key}.pkl")
+
+    def load_parsed(self, cycle, uri):
+        """Returns the parsed page saved in the given AIRAC cycle, or None"""
+        parsed_file = self.parsed_file(cycle, uri)
+        if not os.path.exists(parsed_file):
+            return None
+        with open(parsed_file, "rb") as read_file:
+            return pickle.load(read_file)
+
+    def parse_page(self, uri, parse, depends=()):
+        """Parse a page by calling parse. In diff mode the result is saved with the page's fingerprint, and the result
+        from the previous cycle is used instead of parse if neither the page nor the pages it depends on have changed"""
+        if not self.diff:
+            # without diff mode nothing reads the fingerprint, so the page is only parsed once
+            return parse()
+
+        fingerprint = "/".join(self.page_fingerprint(self.get_page(page)) for page in (uri, *depends))
+        previous = self.load_parsed(self.previousCycle, uri)
+        if previous is None:
+            self.page_changes["new"].append(uri)
+        elif previous["fingerprint"] == fingerprint:
+            self.page_changes["unchanged"].append(uri)
+        else:
+            self.page_changes["changed"].append(uri)
+
+        if (previous is not None) and (previous["fingerprint"] == fingerprint) and (previous["version"] == self.parser_version):
+            result = previous["result"]
+        else:
+            result = parse()
+
+        # saved for the next cycle to compare against
+        parsed_file = self.parsed_file(self.cycle, uri)
+        os.makedirs(os.path.dirname(parsed_file), exist_ok=True)
+        with open(f"{parsed_file}.tmp", "wb") as write_file:
+            pickle.dump({"fingerprint": fingerprint, "version": self.parser_version, "result": result}, write_file)
+        os.replace(f"{parsed_file}.tmp", parsed_file)
+        return result
+
+    def fetch_pages(self, uris):
+        """Download a list of pages concurrently, limited to the number of workers"""
+        fetch = [uri for uri in dict.fromkeys(uris) if uri not in self.pages]
+        if self.cache_dir:
+            fetch = [uri for uri in fetch if not os.path.exists(self.cache_file(uri))]
+        if fetch:
+            print(f"Downloading {len(fetch)} pages using {self.workers} workers...")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(self.get_page, fetch))
 
     def get_table_soup(self, uri):
         """Parse the given table into a beautifulsoup object"""
-        address = self.cycleUrl + uri
-
-        http = urllib3.PoolManager()
-        error = http.request("GET", address)
-        if (error.status == 404):
+        page = self.get_page(uri)
+        if (page == 404):
             return 404
 
-        page = requests.get(address)
-        return BeautifulSoup(page.content, "lxml")
+        return BeautifulSoup(page, "lxml")
+
+    def aerodrome_pages(self, dfAd01):
+        """Return the AD-2 page for each aerodrome in the database"""
+        return [self.country + "-AD-2."+ icao +"-en-GB.html" for icao in dfAd01['icao_designator']]
     
     def cw_acw_helper(self, data_in, output_title, load=0):
         """creates a list of complex airspace areas with the direction of the arc for reference later on"""
         dfColumns = ['area', 'number', 'direction']
-        complex_areas = pd.DataFrame(columns=dfColumns)
+        complex_areas = RecordBuilder(dfColumns)
         row = 0
         complex_search_data = data_in.find_all("p") # find everything enclosed in <p></p> tags
         complex_len = len(complex_search_data)
@@ -117,10 +400,11 @@ class Webscrape:
                     area_number = 0
                     for d in direction:
                         ca_out = {'area': print_title, 'number': str(area_number), 'direction': str(d)}
-                        complex_areas = complex_areas.append(ca_out, ignore_index=True)
+                        complex_areas.add(ca_out)
                         area_number += 1
                     row += 1
             row += 1
+        complex_areas = complex_areas.to_frame()
         if load == 1:
             return complex_areas
         else:
@@ -129,7 +413,7 @@ class Webscrape:
     def circle_helper(self, data_in, output_title, load=0):
         """creates a list of complex airspace areas with the direction of the arc for reference later on"""
         dfColumns = ['area', 'number', 'direction']
-        complex_areas = pd.DataFrame(columns=dfColumns)
+        complex_areas = RecordBuilder(dfColumns)
         row = 0
         complex_search_data = data_in.find_all("p") # find everything enclosed in <p></p> tags
         complex_len = len(complex_search_data)
@@ -140,22 +424,53 @@ class Webscrape:
                 circle = re.findall(r"(?<=\s)(circle)(?=\,|\s)", str(complex_search_data[row+1]))
                 if circle:
                     ca_out = {'area': print_title, 'number': "0", 'direction': "circle"}
-                    complex_areas = complex_areas.append(ca_out, ignore_index=True)
+                    complex_areas.add(ca_out)
                     row += 1
             row += 1
+        complex_areas = complex_areas.to_frame()
         if load == 1:
             return complex_areas
         else:
             complex_areas.to_csv(f'{work_dir}\\DataFrames\{output_title}-Circle-Helper.csv')
 
-    def airspace_parser(self, getData, ad217=0, df_fir=df_fir, df_uir=df_uir, df_cta=df_cta, df_tma=df_tma, df_ctr=df_ctr, df_atz=df_atz, df_danger=dfEnr05):
-        """parse the airspace data from the given page"""
-        # scrape all the data and chuck it in an array
-        data_out = []
-        searchData = getData.find_all("tr")
-        for line in searchData:
-            for l in line.stripped_strings:
-                data_out.append(l)
+    @staticmethod
+    def table_tokens(source):
+        """Yield the text of every table row, streamed from raw page content or taken from a beautifulsoup section"""
+        def element_strings(element):
+            # text of the element and its children in document order, the same as beautifulsoup's stripped_strings
+            if isinstance(element.tag, str) and element.text:
+                yield element.text
+            for child in element:
+                yield from element_strings(child)
+                if child.tail:
+                    yield child.tail
+
+        if isinstance(source, bytes):
+            for event, element in etree.iterparse(io.BytesIO(source), events=("end",), tag="tr", html=True):
+                for text in element_strings(element):
+                    text = text.strip()
+                    if text:
+                        yield text
+                # free the row and anything before it once it has been read
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+        else:
+            for line in source.find_all("tr"):
+                for text in line.stripped_strings:
+                    yield text
+
+    def airspace_parser(self, getData, ad217=0):
+        """parse the airspace data from the given page, either raw page content or a beautifulsoup section"""
+        df_fir = RecordBuilder(dfColumns)
+        df_cta = RecordBuilder(dfColumns)
+        df_tma = RecordBuilder(dfColumns)
+        df_ctr = RecordBuilder(dfColumns)
+        df_atz = RecordBuilder(dfColumns)
+        df_danger = RecordBuilder(dfColumns)
+
+        # stream the data through a window rather than holding the whole page in memory
+        data_out = TokenWindow(self.table_tokens(getData))
 
         # define some bits
         stopstopstop = 0
@@ -172,23 +487,28 @@ class Webscrape:
         frequency = "000.000"
         upper_limit_out = "000"
         lower_limit_out = "000"
+        upper_unit_out = ""
+        lower_unit_out = ""
         airspace_class_out = "E"
         count = 0
 
         # actually do something with the data
-        while (count < len(data_out) and (stopstopstop == 0)):
+        while (data_out.has(count) and (stopstopstop == 0)):
             data_to_wrangle = data_out[count]
-            title = re.search(r"TAIRSPACE;TXT_NAME", str(data_to_wrangle))
-            danger_area = re.search(r"TAIRSPACE;CODE_ID", str(data_to_wrangle))
-            coords = re.search(r"(?:TAIRSPACE_VERTEX;GEO_L(?:AT|ONG);)([\d]{4})", str(data_to_wrangle))
-            callsign = re.search(r"TUNIT;TXT_NAME", str(data_to_wrangle))
-            freq = re.search(r"TFREQUENCY;VAL_FREQ_TRANS", str(data_to_wrangle))
-            arc = re.search(r"TAIRSPACE_VERTEX;VAL_RADIUS_ARC", str(data_to_wrangle))
-            lat_arc = re.search(r"TAIRSPACE_VERTEX;GEO_LAT_ARC", str(data_to_wrangle))
-            lon_arc = re.search(r"TAIRSPACE_VERTEX;GEO_LONG_ARC", str(data_to_wrangle))
-            airspace_class = re.search(r"TAIRSPACE_LAYER_CLASS;CODE_CLASS", str(data_to_wrangle))
-            upper_limit = re.search(r"TAIRSPACE_VOLUME;VAL_DIST_VER_UPPER", str(data_to_wrangle))
-            lower_limit = re.search(r"TAIRSPACE_VOLUME;VAL_DIST_VER_LOWER", str(data_to_wrangle))
+            # classify the token in a single pass, most tokens won't match anything
+            token = AIRSPACE_TOKENS.search(str(data_to_wrangle))
+            token_type = token.lastgroup if token else None
+            title = token_type == "title"
+            danger_area = token_type == "danger_area"
+            coords = token_type == "coords"
+            callsign = token_type == "callsign"
+            freq = token_type == "freq"
+            arc = token_type == "arc"
+            airspace_class = token_type == "airspace_class"
+            upper_limit = token_type == "upper_limit"
+            lower_limit = token_type == "lower_limit"
+            upper_unit = token_type == "upper_unit"
+            lower_unit = token_type == "lower_unit"
 
             if title:
                 # get the printed title
@@ -228,6 +548,13 @@ class Webscrape:
             if lower_limit:
                 # get airspace lower limit
                 lower_limit_out = str(data_out[count-1])
+
+            # the unit (FL, FT or M) comes before the limit, a limit of SFC has no unit and its tag follows straight on
+            if upper_unit:
+                upper_unit_out = "" if ";" in str(data_out[count-1]) else str(data_out[count-1])
+
+            if lower_unit:
+                lower_unit_out = "" if ";" in str(data_out[count-1]) else str(data_out[count-1])
             
             if (freq) and (first_freq is False):
                 # get the first (and only the first) printed callsign
@@ -282,13 +609,13 @@ class Webscrape:
 
                     # convert from dms to dd
                     if cacw == 3:
-                        mid_dd = self.dms2dd(centre_lat.group(1), centre_lon.group(1), centre_lat.group(2), centre_lon.group(2))
+                        mid_dd = coordinates.dms2dd(centre_lat.group(1), centre_lon.group(1), centre_lat.group(2), centre_lon.group(2))
                         start_dd = mid_dd
                         end_dd = mid_dd
                     else:
-                        start_dd = self.dms2dd(start_lat.group(1), start_lon.group(1), start_lat.group(2), start_lon.group(2))
-                        mid_dd = self.dms2dd(centre_lat.group(1), centre_lon.group(1), centre_lat.group(2), centre_lon.group(2))
-                        end_dd = self.dms2dd(end_lat.group(1), end_lon.group(1), end_lat.group(2), end_lon.group(2))
+                        start_dd = coordinates.dms2dd(start_lat.group(1), start_lon.group(1), start_lat.group(2), start_lon.group(2))
+                        mid_dd = coordinates.dms2dd(centre_lat.group(1), centre_lon.group(1), centre_lat.group(2), centre_lon.group(2))
+                        end_dd = coordinates.dms2dd(end_lat.group(1), end_lon.group(1), end_lat.group(2), end_lon.group(2))
                     if danger_area:
                         print(danger_title)
                     else:
@@ -324,7 +651,9 @@ class Webscrape:
                         'frequency': str(frequency),
                         'boundary': str(output),
                         'upper_fl': str(upper_limit),
+                        'upper_unit': upper_unit_out,
                         'lower_fl': str(lower_limit),
+                        'lower_unit': lower_unit_out,
                         'class': str(airspace_class)
                         }
                     return df_out
@@ -334,27 +663,27 @@ class Webscrape:
                     # for FIRs do this
                     if last_airspace.group(1) == "FIR":
                         df_fir_out = coord_to_table(last_df_in_title, callsign_out, frequency, output, upper_limit_out, lower_limit_out, airspace_class_out)
-                        df_fir = df_fir.append(df_fir_out, ignore_index=True)
+                        df_fir.add(df_fir_out)
                     # for UIRs do this - same extent as FIR
                     #if last_airspace.group(1) == "UIR":
                     #    df_uir_out = {'name': last_df_in_title,'callsign': callsign_out,'frequency': str(frequency), 'boundary': str(output), 'upper_fl': '000', 'lower_fl': '000'}
-                    #    df_uir = df_uir.append(df_uir_out, ignore_index=True)
+                    #    df_uir.add(df_uir_out)
                     # for CTAs do this
                     if last_airspace.group(1) == "CTA":
                         df_cta_out = coord_to_table(last_df_in_title, callsign_out, frequency, output, upper_limit_out, lower_limit_out, airspace_class_out)
-                        df_cta = df_cta.append(df_cta_out, ignore_index=True)
+                        df_cta.add(df_cta_out)
                     if last_airspace.group(1) == "TMA":
                         df_tma_out = coord_to_table(last_df_in_title, callsign_out, frequency, output, upper_limit_out, lower_limit_out, airspace_class_out)
-                        df_tma = df_tma.append(df_tma_out, ignore_index=True)
+                        df_tma.add(df_tma_out)
                     if last_airspace.group(1) == "CTR":
                         df_ctr_out = coord_to_table(last_df_in_title, callsign_out, frequency, output, upper_limit_out, lower_limit_out, airspace_class_out)
-                        df_ctr = df_ctr.append(df_ctr_out, ignore_index=True)
+                        df_ctr.add(df_ctr_out)
                     if (last_airspace.group(1) == "ATZ") or (last_airspace.group(1) == "RMZ") or (last_airspace.group(1) == "CTR"):
                         df_atz_out = coord_to_table(last_df_in_title, callsign_out, frequency, output, upper_limit_out, lower_limit_out, airspace_class_out)
-                        df_atz = df_atz.append(df_atz_out, ignore_index=True)
+                        df_atz.add(df_atz_out)
                     if danger:
                         df_danger_out = coord_to_table(last_df_in_title, False, False, output, upper_limit_out, lower_limit_out, False)
-                        df_danger = df_danger.append(df_danger_out, ignore_index=True)
+                        df_danger.add(df_danger_out)
                     space = []
                     loop_coord = True
                     first_callsign = False
@@ -368,11 +697,12 @@ class Webscrape:
                 last_airspace = airspace
             row += 1
             count += 1
+        df_fir = df_fir.to_frame()
         df_uir = df_fir
         if (ad217 == 1):
-            return [df_fir, df_uir, df_cta, df_tma, df_ctr, df_atz_out, df_danger]
+            return [df_fir, df_uir, df_cta.to_frame(), df_tma.to_frame(), df_ctr.to_frame(), df_atz_out, df_danger.to_frame()]
         else:
-            return [df_fir, df_uir, df_cta, df_tma, df_ctr, df_atz, df_danger]
+            return [df_fir, df_uir, df_cta.to_frame(), df_tma.to_frame(), df_ctr.to_frame(), df_atz.to_frame(), df_danger.to_frame()]
 
     def parse_ad01_data(self):
         """Parse the data from AD-0.1"""
@@ -380,7 +710,7 @@ class Webscrape:
 
         # create the table
         dfColumns = ['icao_designator','verified','location','elevation','name','magnetic_variation']
-        df = pd.DataFrame(columns=dfColumns)
+        df = RecordBuilder(dfColumns)
 
         # scrape the data
         getAerodromeList = self.get_table_soup(self.country + "-AD-0.1-en-GB.html")
@@ -395,155 +725,161 @@ class Webscrape:
                 if getAerodrome:
                     # Place each aerodrome into the DB
                     dfOut = {'icao_designator': str(getAerodrome[1]),'verified': 0,'location': 0,'elevation': 0,'name': str(getAerodrome[3]),'magnetic_variation': 0}
-                    df = df.append(dfOut, ignore_index=True)
+                    df.add(dfOut)
                 bar()
-        return df
+        return df.to_frame()
+
+    def ad0202_extract(self, section):
+        """Find the magnetic variation, location and elevation of an aerodrome from AD-2.2"""
+        # Find current magnetic variation for this aerodrome
+        aerodromeMagVar = self.search("([\d]{1}\.[\d]{2}).([W|E]{1})", "TAD_HP;VAL_MAG_VAR", str(section))
+        pM = self.plusMinus(aerodromeMagVar[0][1])
+        floatMagVar = pM + aerodromeMagVar[0][0]
+
+        # Find lat/lon/elev for aerodrome
+        aerodromeLat = re.search(r'(Lat: )(<span class="SD" id="ID_[\d]{7}">)([\d]{6})([N|S]{1})', str(section))
+        aerodromeLon = re.search(r"(Long: )(<span class=\"SD\" id=\"ID_[\d]{7}\">)([\d]{7})([E|W]{1})", str(section))
+        aerodromeElev = re.search(r"(VAL_ELEV\;)([\d]{1,4})", str(section))
+
+        full_location = coordinates.sct_location_builder(
+            aerodromeLat.group(3),
+            aerodromeLon.group(3),
+            aerodromeLat.group(4),
+            aerodromeLon.group(4)
+            )
+
+        return {'verified': 1, 'magnetic_variation': str(floatMagVar), 'location': str(full_location), 'elevation': str(aerodromeElev[2])}
+
+    def ad0212_extract(self, aeroIcao, section):
+        """Find the runways of an aerodrome from AD-2.12"""
+        rows = []
+
+        # Find runway locations
+        aerodromeRunways = self.search("([\d]{2}[L|C|R]?)", "TRWY_DIRECTION;TXT_DESIG", str(section))
+        aerodromeRunwaysLat = self.search("([\d]{6}[\.]?[\d]{0,2}[N|S]{1})", "TRWY_CLINE_POINT;GEO_LAT", str(section))
+        aerodromeRunwaysLong = self.search("([\d]{7}[\.]?[\d]{0,2}[E|W]{1})", "TRWY_CLINE_POINT;GEO_LONG", str(section))
+        aerodromeRunwaysElev = self.search("([\d]{1,3}\.[\d]{1})", "TRWY_CLINE_POINT;VAL_ELEV", str(section))
+        aerodromeRunwaysBearing = self.search("([\d]{3}\.[\d]{2}.)", "TRWY_DIRECTION;VAL_TRUE_BRG", str(section))
+        aerodromeRunwaysLen = self.search("([\d]{3,4})", "TRWY;VAL_LEN", str(section))
+
+        for rwy, lat, lon, elev, brg, rwyLen in zip(aerodromeRunways, aerodromeRunwaysLat, aerodromeRunwaysLong, aerodromeRunwaysElev, aerodromeRunwaysBearing, aerodromeRunwaysLen):
+            # Add runway to the aerodromeDB
+            latSplit = re.search(r"([\d]{6})(\.[\d]{2})?([N|S]{1})", str(lat))
+            lonSplit = re.search(r"([\d]{7})(\.[\d]{2})?([E|W]{1})", str(lon))
+
+            if latSplit.group(2) is None:
+                printer_la = latSplit.group(1)
+            else:
+                printer_la = latSplit.group(1) + latSplit.group(2)
+            
+            if lonSplit.group(2) is None:
+                printer_lo = lonSplit.group(1)
+            else:
+                printer_lo = lonSplit.group(1) + lonSplit.group(2)
+
+            loc = coordinates.sct_location_builder(
+                printer_la,
+                printer_lo,
+                latSplit.group(3),
+                lonSplit.group(3)
+                )
+
+            rows.append({'icao_designator': str(aeroIcao),'runway': str(rwy),'location': str(loc),'elevation': str(elev),'bearing': str(brg.rstrip('°')),'length': str(rwyLen)})
+        return rows
+
+    def ad0217_extract(self, section):
+        """Find the air traffic services airspace of an aerodrome from AD-2.17"""
+        output = self.airspace_parser(section, 1)
+        return output[5]
+
+    def ad0218_extract(self, aeroIcao, section):
+        """Find the air traffic services frequencies of an aerodrome from AD-2.18"""
+        rows = []
+
+        # Find air traffic services
+        aerodromeServices = self.search("(APPROACH|GROUND|DELIVERY|TOWER|DIRECTOR|INFORMATION|RADAR|RADIO|FIRE|EMERGENCY)", "TCALLSIGN_DETAIL", str(section))
+        serviceFrequency = self.search("([\d]{3}\.[\d]{3})", "TFREQUENCY", str(section))
+
+        last_srv = ''
+        if len(aerodromeServices) == len(serviceFrequency):
+            # Simple aerodrome setups with 1 job, 1 frequency
+            for srv, frq in zip(aerodromeServices, serviceFrequency):
+                if str(srv) is None:
+                    s_type = last_srv
+                else:
+                    s_type = str(srv)
+                    last_srv = s_type
+                rows.append({'icao_designator': str(aeroIcao),'callsign_type': s_type,'frequency': str(frq)})
+        else:
+            # Complex aerodrome setups with multiple frequencies for the same job
+            print(Fore.BLUE + "    Aerodrome " + aeroIcao + " has a complex comms structure" + Style.RESET_ALL)
+            for row in section.find_all("span"):
+                # get the full row and search between two "TCALLSIGN_DETAIL" objects
+                table_row = re.search(r"(APPROACH|GROUND|DELIVERY|TOWER|DIRECTOR|INFORMATION|RADAR|RADIO|FIRE|EMERGENCY)", str(row))
+                if table_row is not None:
+                    callsign_type = table_row.group(1)
+                freq_row = re.search(r"([\d]{3}\.[\d]{3})", str(row))
+                if freq_row is not None:
+                    frequency = str(freq_row.group(1))
+                    if frequency != "121.500": # filter out guard frequencies
+                        rows.append({'icao_designator': str(aeroIcao),'callsign_type': callsign_type,'frequency': frequency})
+        return rows
+
+    def ad02_extract(self, aeroIcao, page):
+        """Parse every section used from an aerodrome's AD-2 page, returns 404 if the page doesn't exist"""
+        getAerodrome = self.get_table_soup(page)
+        if getAerodrome == 404:
+            return 404
+
+        print("  Parsing AD-2 data for " + aeroIcao)
+        # every section parser works from the same soup
+        return {
+            'ad0202': self.ad0202_extract(getAerodrome.find(id=aeroIcao + "-AD-2.2")),
+            'runways': self.ad0212_extract(aeroIcao, getAerodrome.find(id=aeroIcao + "-AD-2.12")),
+            'ad0217': self.ad0217_extract(getAerodrome.find(id=aeroIcao + "-AD-2.17")),
+            'services': self.ad0218_extract(aeroIcao, getAerodrome.find(id=aeroIcao + "-AD-2.18"))
+            }
 
     def parse_ad02_data(self, dfAd01):
-        """Parse the data from AD-2.x"""
+        """Parse the data from AD-2.x, each aerodrome page is fetched and parsed once for all sections"""
         print("Parsing "+ self.country +"-AD-2.x data to obtain aerodrome data...")
         df_columns_rwy = ['icao_designator','runway','location','elevation','bearing','length']
-        df_rwy = pd.DataFrame(columns=df_columns_rwy)
+        df_rwy = RecordBuilder(df_columns_rwy)
 
         df_columns_srv = ['icao_designator','callsign_type','frequency']
-        df_srv = pd.DataFrame(columns=df_columns_srv)
+        df_srv = RecordBuilder(df_columns_srv)
+
+        df_atz = RecordBuilder(dfColumns)
+
+        # Download all the aerodrome pages before parsing
+        self.fetch_pages(self.aerodrome_pages(dfAd01))
 
         # Select all aerodromes in the database
         barLength = len(dfAd01.index)
         with alive_bar(barLength) as bar: # Define the progress bar
             for index, row in dfAd01.iterrows():
                 aeroIcao = row['icao_designator']
-                # Select all runways in this aerodrome
-                getRunways = self.get_table_soup(self.country + "-AD-2."+ aeroIcao +"-en-GB.html")
-                if getRunways !=404:
-                    print("  Parsing AD-2 data for " + aeroIcao)
-                    aerodromeAd0202 = getRunways.find(id=aeroIcao + "-AD-2.2")
-                    aerodromeAd0212 = getRunways.find(id=aeroIcao + "-AD-2.12")
-                    aerodromeAd0218 = getRunways.find(id=aeroIcao + "-AD-2.18")
-
-                    # Find current magnetic variation for this aerodrome
-                    aerodromeMagVar = self.search("([\d]{1}\.[\d]{2}).([W|E]{1})", "TAD_HP;VAL_MAG_VAR", str(aerodromeAd0202))
-                    pM = self.plusMinus(aerodromeMagVar[0][1])
-                    floatMagVar = pM + aerodromeMagVar[0][0]
-
-                    # Find lat/lon/elev for aerodrome
-                    aerodromeLat = re.search(r'(Lat: )(<span class="SD" id="ID_[\d]{7}">)([\d]{6})([N|S]{1})', str(aerodromeAd0202))
-                    aerodromeLon = re.search(r"(Long: )(<span class=\"SD\" id=\"ID_[\d]{7}\">)([\d]{7})([E|W]{1})", str(aerodromeAd0202))
-                    aerodromeElev = re.search(r"(VAL_ELEV\;)([\d]{1,4})", str(aerodromeAd0202))
-
-                    full_location = self.sct_location_builder(
-                        aerodromeLat.group(3),
-                        aerodromeLon.group(3),
-                        aerodromeLat.group(4),
-                        aerodromeLon.group(4)
-                        )
-
-                    dfAd01.at[index, 'verified'] = 1
-                    dfAd01.at[index, 'magnetic_variation'] = str(floatMagVar)
-                    dfAd01.at[index, 'location'] = str(full_location)
-                    dfAd01.at[index, 'elevation'] = str(aerodromeElev[2])
-
-                    # Find runway locations
-                    aerodromeRunways = self.search("([\d]{2}[L|C|R]?)", "TRWY_DIRECTION;TXT_DESIG", str(aerodromeAd0212))
-                    #print(aerodromeRunways)
-                    aerodromeRunwaysLat = self.search("([\d]{6}[\.]?[\d]{0,2}[N|S]{1})", "TRWY_CLINE_POINT;GEO_LAT", str(aerodromeAd0212))
-                    #print(aerodromeRunwaysLat)
-                    aerodromeRunwaysLong = self.search("([\d]{7}[\.]?[\d]{0,2}[E|W]{1})", "TRWY_CLINE_POINT;GEO_LONG", str(aerodromeAd0212))
-                    #print(aerodromeRunwaysLong)
-                    aerodromeRunwaysElev = self.search("([\d]{1,3}\.[\d]{1})", "TRWY_CLINE_POINT;VAL_ELEV", str(aerodromeAd0212))
-                    #print(aerodromeRunwaysElev)
-                    aerodromeRunwaysBearing = self.search("([\d]{3}\.[\d]{2}.)", "TRWY_DIRECTION;VAL_TRUE_BRG", str(aerodromeAd0212))
-                    #print(aerodromeRunwaysBearing)
-                    aerodromeRunwaysLen = self.search("([\d]{3,4})", "TRWY;VAL_LEN", str(aerodromeAd0212))
-                    #print(aerodromeRunwaysLen)
-
-                    for rwy, lat, lon, elev, brg, rwyLen in zip(aerodromeRunways, aerodromeRunwaysLat, aerodromeRunwaysLong, aerodromeRunwaysElev, aerodromeRunwaysBearing, aerodromeRunwaysLen):
-                        # Add runway to the aerodromeDB
-                        latSplit = re.search(r"([\d]{6})(\.[\d]{2})?([N|S]{1})", str(lat))
-                        lonSplit = re.search(r"([\d]{7})(\.[\d]{2})?([E|W]{1})", str(lon))
-
-                        if latSplit.group(2) is None:
-                            printer_la = latSplit.group(1)
-                        else:
-                            printer_la = latSplit.group(1) + latSplit.group(2)
-                        
-                        if lonSplit.group(2) is None:
-                            printer_lo = lonSplit.group(1)
-                        else:
-                            printer_lo = lonSplit.group(1) + lonSplit.group(2)
-
-                        loc = self.sct_location_builder(
-                            printer_la,
-                            printer_lo,
-                            latSplit.group(3),
-                            lonSplit.group(3)
-                            )
-
-                        df_rwy_out = {'icao_designator': str(aeroIcao),'runway': str(rwy),'location': str(loc),'elevation': str(elev),'bearing': str(brg.rstrip('°')),'length': str(rwyLen)}
-                        #print(df_rwy_out)
-                        df_rwy = df_rwy.append(df_rwy_out, ignore_index=True)
-
-                    # Find air traffic services
-                    aerodromeServices = self.search("(APPROACH|GROUND|DELIVERY|TOWER|DIRECTOR|INFORMATION|RADAR|RADIO|FIRE|EMERGENCY)", "TCALLSIGN_DETAIL", str(aerodromeAd0218))
-                    serviceFrequency = self.search("([\d]{3}\.[\d]{3})", "TFREQUENCY", str(aerodromeAd0218))
-
-                    last_srv = ''
-                    if len(aerodromeServices) == len(serviceFrequency):
-                        # Simple aerodrome setups with 1 job, 1 frequency
-                        for srv, frq in zip(aerodromeServices, serviceFrequency):
-                            if str(srv) is None:
-                                s_type = last_srv
-                            else:
-                                s_type = str(srv)
-                                last_srv = s_type
-                            df_srv_out = {'icao_designator': str(aeroIcao),'callsign_type': s_type,'frequency': str(frq)}
-                            df_srv = df_srv.append(df_srv_out, ignore_index=True)
-                    else:
-                        # Complex aerodrome setups with multiple frequencies for the same job
-                        print(Fore.BLUE + "    Aerodrome " + aeroIcao + " has a complex comms structure" + Style.RESET_ALL)
-                        for row in aerodromeAd0218.find_all("span"):
-                            # get the full row and search between two "TCALLSIGN_DETAIL" objects
-                            table_row = re.search(r"(APPROACH|GROUND|DELIVERY|TOWER|DIRECTOR|INFORMATION|RADAR|RADIO|FIRE|EMERGENCY)", str(row))
-                            if table_row is not None:
-                                callsign_type = table_row.group(1)
-                            freq_row = re.search(r"([\d]{3}\.[\d]{3})", str(row))
-                            if freq_row is not None:
-                                frequency = str(freq_row.group(1))
-                                if frequency != "121.500": # filter out guard frequencies
-                                    df_srv_out = {'icao_designator': str(aeroIcao),'callsign_type': callsign_type,'frequency': frequency}
-                                    df_srv = df_srv.append(df_srv_out, ignore_index=True)
+                page = self.country + "-AD-2."+ aeroIcao +"-en-GB.html"
+                aerodrome = self.parse_page(page, lambda: self.ad02_extract(aeroIcao, page))
+                # the page is no longer needed once it has been parsed
+                self.pages.pop(page, None)
+                if aerodrome != 404:
+                    for column, value in aerodrome['ad0202'].items():
+                        dfAd01.at[index, column] = value
+                    df_rwy.add(aerodrome['runways'])
+                    if aerodrome['ad0217'] != False:
+                        df_atz.add(aerodrome['ad0217'])
+                    df_srv.add(aerodrome['services'])
                 else:
                     print(Fore.RED + "Aerodrome " + aeroIcao + " does not exist" + Style.RESET_ALL)
                 bar()
-        return [dfAd01, df_rwy, df_srv]
+        return [dfAd01, df_rwy.to_frame(), df_srv.to_frame(), df_atz.to_frame()]
     
-    def parse_ad0217_data(self, dfAd01): # re-write of this section has been completed
-        """This will parse airspace data from AD 2.17 for each aerodrome"""
-        print("Parsing "+ self.country +"-AD-2.17 Data (AIR TRAFFIC SERVICES AIRSPACE)...")
-
-        dfColumns = ['name', 'callsign', 'frequency', 'boundary', 'upper_fl', 'lower_fl', 'class']
-        df_atz = pd.DataFrame(columns=dfColumns)
-
-        # Select all aerodromes in the database
-        for index, rowu in dfAd01.iterrows():
-            aeroIcao = rowu['icao_designator']
-            # Select all runways in this aerodrome
-            getAerodromes = self.get_table_soup(self.country + "-AD-2."+ aeroIcao +"-en-GB.html")
-            if getAerodromes !=404:
-                print("  Parsing AD-2.17 data for " + aeroIcao)
-                #getData = self.get_table_soup(self.country + "-ENR-2.1-en-GB.html")
-                getData = getAerodromes.find(id=aeroIcao + "-AD-2.17")
-                output = self.airspace_parser(getData, 1)
-                if output[5] != False:
-                    df_atz = df_atz.append(output[5], ignore_index=True)
-                
-        return df_atz
-
     def parse_enr016_data(self, dfAd01):
         """Parse the data from ENR-1.6"""
         print("Parsing "+ self.country + "-ENR-1.6 data to obtan SSR code allocation plan")
         dfColumns = ['start','end','depart','arrive', 'string']
-        df = pd.DataFrame(columns=dfColumns)
+        df = RecordBuilder(dfColumns)
 
         webpage = self.get_table_soup(self.country + "-ENR-1.6-en-GB.html")
         getDiv = webpage.find("div", id = "ENR-1.6.2.6")
@@ -568,21 +904,21 @@ class Webscrape:
                                 name = dfAd01[dfAd01['name'].str.contains(strip.group(1), case=False, na=False)]
                                 if len(name.index) == 1:
                                     dfOut = {'start': start,'end': end,'depart': dep,'arrive': name.iloc[0]['icao_designator'],'string': strip.group(1)}
-                                    df = df.append(dfOut, ignore_index=True)
+                                    df.add(dfOut)
                                 elif strip.group(1) == "RAF" or strip.group(1) == "Military" or strip.group(1) == "RNAS" or strip.group(1) == "NATO":
                                     dfOut = {'start': start,'end': end,'depart': dep,'arrive': 'Military','string': strip.group(1)}
-                                    df = df.append(dfOut, ignore_index=True)
+                                    df.add(dfOut)
                                 elif strip.group(1) == "Transit":
                                     dfOut = {'start': start,'end': end,'depart': dep,'arrive': locArray[2],'string': strip.group(1)}
-                                    df = df.append(dfOut, ignore_index=True)
+                                    df.add(dfOut)
                 bar()
-        return(df)
+        return df.to_frame()
 
     def parse_enr021_data(self): # re-write of this section has been completed
         """This will parse ENR 2 data from the given AIP"""
 
         print("Parsing "+ self.country +"-ENR-2.1 Data (FIR, UIR, TMA AND CTA)...")
-        getData = self.get_table_soup(self.country + "-ENR-2.1-en-GB.html")
+        getData = self.get_page(self.country + "-ENR-2.1-en-GB.html")
         output = self.airspace_parser(getData)
         
         return [output[0], output[1], output[2], output[3]]
@@ -591,7 +927,7 @@ class Webscrape:
         """This will parse ENR 2.2 data from the given AIP"""
         
         print("Parsing "+ self.country +"-ENR-2.2 Data (OTHER REGULATED AIRSPACE)...")
-        getData = self.get_table_soup(self.country + "-ENR-2.2-en-GB.html")
+        getData = self.get_page(self.country + "-ENR-2.2-en-GB.html")
         output = self.airspace_parser(getData)
 
         return output[5]
@@ -601,7 +937,7 @@ class Webscrape:
         part_number = False
 
         dfColumns = ['name', 'boundary']
-        df = pd.DataFrame(columns=dfColumns)
+        df = RecordBuilder(dfColumns)
 
         def wrangler(data, sector, df):
             """sorts out all of the random coords into something useful"""
@@ -613,7 +949,7 @@ class Webscrape:
                     lon = p[2]
                     ns = p[1]
                     ew = p[3]
-                    q = self.sct_location_builder(lat, lon, ns, ew)
+                    q = coordinates.sct_location_builder(lat, lon, ns, ew)
                     latlon = f"{latlon}/{q}"
                 latlon = latlon.lstrip("/")
                 dfOut = {'name': str(sector), 'boundary': str(latlon)}
@@ -637,14 +973,14 @@ class Webscrape:
                 # find area name
                 if area_name:
                     dfOut = wrangler(coord_full, area, df)
-                    df = df.append(dfOut, ignore_index=True)
+                    df.add(dfOut)
                     coord_full = ""
                     area = split_line[0]
                 elif sector_name or sector_number:
                     # sector name or number
                     if part_number:
                         dfOut = wrangler(coord_full, sector, df)
-                        df = df.append(dfOut, ignore_index=True)
+                        df.add(dfOut)
                         coord_full = ""
                         sector = f"{area} {split_line[0]} {part_number[0]}"
                     else:
@@ -679,11 +1015,11 @@ class Webscrape:
                                 coord = input(f"Error spotted with {coord}, please enter correct value: ")
                         coord_full = f"{coord_full} {coord}"
 
-        return df
+        return df.to_frame()
 
     def parse_enr03_data(self, section):
         dfColumns = ['name', 'route']
-        dfEnr03 = pd.DataFrame(columns=dfColumns)
+        dfEnr03 = RecordBuilder(dfColumns)
         print("Parsing "+ self.country +"-ENR-3."+ section +" data to obtain ATS routes...")
         getENR3 = self.get_table_soup(self.country + "-ENR-3."+ section +"-en-GB.html")
         listTables = getENR3.find_all("tbody")
@@ -697,13 +1033,13 @@ class Webscrape:
                     for point in getAirwayRoute:
                         printRoute += str(point[0]) + "/"
                     dfOut = {'name': str(getAirwayName[0]), 'route': str(printRoute).rstrip('/')}
-                    dfEnr03 = dfEnr03.append(dfOut, ignore_index=True)
+                    dfEnr03.add(dfOut)
                 bar()
-        return dfEnr03
+        return dfEnr03.to_frame()
 
     def parse_enr04_data(self, sub):
         dfColumns = ['name', 'type', 'coords', 'freq']
-        df = pd.DataFrame(columns=dfColumns)
+        df = RecordBuilder(dfColumns)
         print("Parsing "+ self.country +"-ENR-4."+ sub +" Data (RADIO NAVIGATION AIDS - EN-ROUTE)...")
         getData = self.get_table_soup(self.country + "-ENR-4."+ sub +"-en-GB.html")
         listData = getData.find_all("tr", class_ = "Table-row-type-3")
@@ -721,7 +1057,7 @@ class Webscrape:
                 pointLon = re.search(r"([\d]{7}(\.[\d]{2}|))([W|E]{1})", str(lon))
 
                 if pointLat:
-                    fullLocation = self.sct_location_builder(
+                    fullLocation = coordinates.sct_location_builder(
                         pointLat.group(1),
                         pointLon.group(1),
                         pointLat.group(3),
@@ -746,15 +1082,15 @@ class Webscrape:
                         # Add fix to the aerodromeDB
                         dfOut = {'name': str(name[1]), 'type': 'FIX', 'coords': str(fullLocation), 'freq': '000.000'}
 
-                    df = df.append(dfOut, ignore_index=True)
+                    df.add(dfOut)
                 bar()
-        return df
+        return df.to_frame()
 
     def parse_enr051_data(self):
         """This will parse ENR 5.1 data from the given AIP"""
 
         print("Parsing "+ self.country +"-ENR-5.1 data for PROHIBITED, RESTRICTED AND DANGER AREAS...")
-        get_data = self.get_table_soup(self.country + "-ENR-5.1-en-GB.html")
+        get_data = self.get_page(self.country + "-ENR-5.1-en-GB.html")
         output = self.airspace_parser(get_data, 2)
 
         return output[6]
@@ -772,78 +1108,72 @@ class Webscrape:
 
     def run(self):
         full_dir = f"{work_dir}\\DataFrames\\"
-        Ad01 = self.parse_ad01_data() # returns single dataframe
-        Ad02 = self.parse_ad02_data(Ad01) # returns dfAd01, df_rwy, df_srv
-        Ad0217 = self.parse_ad0217_data(Ad01) # returns single dataframe
-        Enr016 = self.parse_enr016_data(Ad01) # returns single dataframe
-        Enr021 = self.parse_enr021_data() # returns dfFir, dfUir, dfCta, dfTma
-        Enr022 = self.parse_enr022_data() # returns single dataframe
-        Enr031 = self.parse_enr03_data('1') # returns single dataframe
-        Enr033 = self.parse_enr03_data('3') # returns single dataframe
-        Enr035 = self.parse_enr03_data('5') # returns single dataframe
-        Enr041 = self.parse_enr04_data('1') # returns single dataframe
-        Enr044 = self.parse_enr04_data('4') # returns single dataframe
-        Enr051 = self.parse_enr051_data() # returns single dataframe
+
+        # Download the AD-0.1 and ENR pages up front, these don't depend on each other
+        enr_pages = ["AD-0.1", "ENR-1.6", "ENR-2.1", "ENR-2.2", "ENR-3.1", "ENR-3.3", "ENR-3.5", "ENR-4.1", "ENR-4.4", "ENR-5.1"]
+        self.fetch_pages([f"{self.country}-{page}-en-GB.html" for page in enr_pages])
+
+        # every page is parsed through parse_page, so in diff mode the pages which haven't changed are carried forward
+        page = lambda name: f"{self.country}-{name}-en-GB.html"
+        Ad01 = self.parse_page(page("AD-0.1"), self.parse_ad01_data) # returns single dataframe
+        Ad02 = self.parse_ad02_data(Ad01) # returns dfAd01, df_rwy, df_srv, df_atz
+        Ad0217 = Ad02[3] # AD-2.17 is parsed in the same pass as the rest of AD-2
+        Enr016 = self.parse_page(page("ENR-1.6"), lambda: self.parse_enr016_data(Ad01), [page("AD-0.1")]) # returns single dataframe
+        Enr021 = self.parse_page(page("ENR-2.1"), self.parse_enr021_data) # returns dfFir, dfUir, dfCta, dfTma
+        Enr022 = self.parse_page(page("ENR-2.2"), self.parse_enr022_data) # returns single dataframe
+        Enr031 = self.parse_page(page("ENR-3.1"), lambda: self.parse_enr03_data('1')) # returns single dataframe
+        Enr033 = self.parse_page(page("ENR-3.3"), lambda: self.parse_enr03_data('3')) # returns single dataframe
+        Enr035 = self.parse_page(page("ENR-3.5"), lambda: self.parse_enr03_data('5')) # returns single dataframe
+        Enr041 = self.parse_page(page("ENR-4.1"), lambda: self.parse_enr04_data('1')) # returns single dataframe
+        Enr044 = self.parse_page(page("ENR-4.4"), lambda: self.parse_enr04_data('4')) # returns single dataframe
+        Enr051 = self.parse_page(page("ENR-5.1"), self.parse_enr051_data) # returns single dataframe
         AccUac = self.acc_uac_control_sectors() # returns single dataframe
 
-        Ad01.to_csv(f'{full_dir}Ad01.csv')
-        Ad02[1].to_csv(f'{full_dir}Ad02-Runways.csv')
-        Ad02[2].to_csv(f'{full_dir}Ad02-Services.csv')
-        Ad0217.to_csv(f'{full_dir}Ad0217-ATS.csv')
-        Enr016.to_csv(f'{full_dir}Enr016.csv')
-        Enr021[0].to_csv(f'{full_dir}Enr021-FIR.csv')
-        Enr021[1].to_csv(f'{full_dir}Enr021-UIR.csv')
-        Enr021[2].to_csv(f'{full_dir}Enr021-CTA.csv')
-        Enr021[3].to_csv(f'{full_dir}Enr021-TMA.csv')
-        Enr022.to_csv(f'{full_dir}Enr022-ATZ.csv')
-        Enr031.to_csv(f'{full_dir}Enr031.csv')
-        Enr033.to_csv(f'{full_dir}Enr033.csv')
-        Enr035.to_csv(f'{full_dir}Enr035.csv')
-        Enr041.to_csv(f'{full_dir}Enr041.csv')
-        Enr044.to_csv(f'{full_dir}Enr044.csv')
-        Enr051.to_csv(f'{full_dir}Enr051.csv')
-        AccUac.to_csv(f'{full_dir}AccUac.csv')
+        tables = [
+            Ad01, Ad02[1], Ad02[2], Enr016, Enr021[0], Enr021[1], Enr021[2], Enr021[3], Enr022,
+            Enr031, Enr033, Enr035, Enr041, Enr044, Enr051, Ad0217, AccUac
+            ]
+        if self.diff:
+            # compare with the tables from the last scrape before they are replaced
+            previous = {table: storage.read_text(full_dir, table) for table in storage.TABLES}
+            current = {table: storage.text_table(df) for table, df in zip(storage.TABLES, tables)}
+            self.write_changelog(f"{full_dir}Changelog.json", storage.changelog(previous, current))
+
+        storage.save_tables(tables, full_dir, self.arrow)
+
+        arc_cache = arcs.cache_info()
+        print(f"Arc cache: {arc_cache.hits} hits, {arc_cache.misses} misses")
 
         return [Ad01, Ad02, Enr016, Enr021, Enr022, Enr031, Enr033, Enr035, Enr041, Enr044, Enr051]
 
+    def write_changelog(self, filename, changes):
+        """Write the pages and rows which have changed since the previous cycle as JSON"""
+        storage.write_json(filename, {
+            'cycle': str(self.cycle),
+            'previous_cycle': str(self.previousCycle),
+            'pages': self.page_changes,
+            **changes
+            })
+        print(f"Pages: {len(self.page_changes['changed'])} changed, {len(self.page_changes['unchanged'])} unchanged, {len(self.page_changes['new'])} new")
+        for group, change in changes.items():
+            print(f"{group.capitalize()}: {len(change['added'])} added, {len(change['removed'])} removed, {len(change['changed'])} changed")
+
     @staticmethod
     def search(find, name, string):
         searchString = find + "(?=<\/span>.*>" + name + ")"
         result = re.findall(f"{str(searchString)}", str(string))
         return result
 
-    @staticmethod
-    def split(word):
-        return [char for char in word]
-    
-    def sct_location_builder(self, lat, lon, lat_ns, lon_ew):
-        """Returns an SCT file compliant location"""
-        lat_split = self.split(lat) # split the lat into individual digits
-        if len(lat_split) > 6:
-            lat_print = f"{lat_ns}{lat_split[0]}{lat_split[1]}.{lat_split[2]}{lat_split[3]}.{lat_split[4]}{lat_split[5]}.{lat_split[7]}{lat_split[8]}"
-        else:
-            lat_print = f"{lat_ns}{lat_split[0]}{lat_split[1]}.{lat_split[2]}{lat_split[3]}.{lat_split[4]}{lat_split[5]}.00"
-
-        lon_split = self.split(lon)
-        if len(lon_split) > 7:
-            lon_print = f"{lon_ew}{lon_split[0]}{lon_split[1]}{lon_split[2]}.{lon_split[3]}{lon_split[4]}.{lon_split[5]}{lon_split[6]}.{lon_split[8]}{lon_split[9]}"
-        else:
-            lon_print = f"{lon_ew}{lon_split[0]}{lon_split[1]}{lon_split[2]}.{lon_split[3]}{lon_split[4]}.{lon_split[5]}{lon_split[6]}.00"
-
-        fullLocation = f"{lat_print} {lon_print}" # AD-2.2 gives aerodrome location as DDMMSS / DDDMMSS
-
-        return fullLocation
-
     def getBoundary(self, space, name=0):
         """creates a boundary useable in vatSys from AIRAC data"""
         lat = True
         lat_lon_obj = []
-        draw_line = []
-        fullBoundary = ''
+        fullBoundary = [] # joined once at the end
+        aip_points = [] # eAIP coordinates are converted together once the whole boundary has been read
         for coord in space:
             coord_format = re.search(r"[N|S][\d]{2,3}\.[\d]{1,2}\.[\d]{1,2}\.[\d]{1,2}\s[E|W][\d]{2,3}\.[\d]{1,2}\.[\d]{1,2}\.[\d]{1,2}", str(coord))
             if coord_format != None:
-                fullBoundary += f"{coord}/"
+                fullBoundary.append(str(coord))
             else:
                 if lat:
                     lat_lon_obj.append(coord[0])
@@ -856,252 +1186,70 @@ class Webscrape:
                 
                 # if lat_lon_obj has 4 items
                 if len(lat_lon_obj) == 4:
-                    lat_lon = self.sct_location_builder(lat_lon_obj[0], lat_lon_obj[2], lat_lon_obj[1], lat_lon_obj[3])
-                    fullBoundary += f"{lat_lon}/"
-                    draw_line.append(lat_lon)
+                    aip_points.append((len(fullBoundary), lat_lon_obj[0], lat_lon_obj[2], lat_lon_obj[1], lat_lon_obj[3]))
+                    fullBoundary.append(None)
                     lat_lon_obj = []
 
-        return fullBoundary.rstrip('/')
-    
-    @staticmethod
-    def split_single(word):
-        return [char for char in str(word)]
-
-    def dms2dd(self, lat, lon, ns, ew):
-        lat_split = self.split_single(lat)
-        lon_split = self.split_single(lon)
-
-        lat_dd = lat_split[0] + lat_split[1]
-        lat_mm = lat_split[2] + lat_split[3]
-        lat_ss = lat_split[4] + lat_split[5]
-
-        # lat N or S (+/-) lon E or W (+/-)
-
-        lat_out = int(lat_dd) + int(lat_mm) / 60 + int(lat_ss) / 3600
-
-        lon_dd = lon_split[0] + lon_split[1] + lon_split[2]
-        lon_mm = lon_split[3] + lon_split[4]
-        lon_ss = lon_split[5] + lon_split[6]
-
-        lon_out = int(lon_dd) + int(lon_mm) / 60 + int(lon_ss) / 3600
-
-        if ns == "S":
-            lat_out = lat_out - (lat_out * 2)
-        if ew == "W":
-            lon_out = lon_out - (lon_out * 2)
-
-        return [lat_out, lon_out]
+        if aip_points:
+            position, lats, lons, lat_ns, lon_ew = zip(*aip_points)
+            for i, lat_lon in zip(position, coordinates.aip_to_sct(lats, lons, lat_ns, lon_ew)):
+                fullBoundary[i] = lat_lon
 
+        return "/".join(fullBoundary)
+    
     def generate_semicircle(self, center_x, center_y, start_x, start_y, end_x, end_y, direction, dst=2.5):
-        """Dreate a semicircle. Direction is 1 for clockwise and 2 for anti-clockwise"""
-
-        if (direction == 1) or (direction == 2):
-            # centre point to start
-            geolib_start = Geodesic.WGS84.Inverse(center_x, center_y, start_x, start_y)
-            start_brg = geolib_start['azi1']
-            start_dst = geolib_start['s12']
-            start_brg_compass = ((360 + start_brg) % 360)
-
-            # centre point to end
-            geolib_end = Geodesic.WGS84.Inverse(center_x, center_y, end_x, end_y)
-            end_brg = geolib_end['azi1']
-            end_brg_compass = ((360 + end_brg) % 360)
-        elif direction == 3: # if direction set to 3, draw a circle
-            start_brg = 0
-            start_dst = dst * 1852 # convert nautical miles to meters
-            end_brg_compass = 359
-            direction = 1 # we can set the direction to 1 as the bit of code below can still be used
-
-        arc_out = []
-        if direction == 1: # if cw
-            while round(start_brg) != round(end_brg_compass):
-                arc_coords = Geodesic.WGS84.Direct(center_x, center_y, start_brg, start_dst)
-                arc_out.append(self.dd2dms(arc_coords['lat2'], arc_coords['lon2'], "1"))
-                start_brg = ((start_brg + 1) % 360)
-        elif direction == 2: # if acw
-            while round(start_brg) != round(end_brg_compass):
-                arc_coords = Geodesic.WGS84.Direct(center_x, center_y, start_brg, start_dst)
-                arc_out.append(self.dd2dms(arc_coords['lat2'], arc_coords['lon2'], "1"))
-                start_brg = ((start_brg - 1) % 360)
-
-        return arc_out
-
-    @staticmethod
-    def dd2dms(latitude, longitude, dd_type=0):
+        """Create an arc or circle. Direction is 1 for clockwise, 2 for anti-clockwise and 3 for a circle of radius dst (NM)"""
+        # all the points on the arc are generated in one batch
+        lats, lons = arcs.generate_arc(center_x, center_y, start_x, start_y, end_x, end_y, direction, dst, self.arc_tolerance)
+        return coordinates.format_dms(lats, lons)
 
-        # math.modf() splits whole number and decimal into tuple
-        # eg 53.3478 becomes (0.3478, 53)
-        split_degx = math.modf(longitude)
-        
-        # the whole number [index 1] is the degrees
-        degrees_x = int(split_degx[1])
-
-        # multiply the decimal part by 60: 0.3478 * 60 = 20.868
-        # split the whole number part of the total as the minutes: 20
-        # abs() absoulte value - no negative
-        minutes_x = abs(int(math.modf(split_degx[0] * 60)[1]))
-
-        # multiply the decimal part of the split above by 60 to get the seconds
-        # 0.868 x 60 = 52.08, round excess decimal places to 2 places
-        # abs() absoulte value - no negative
-        seconds_x = abs(round(math.modf(split_degx[0] * 60)[0] * 60,2))
-
-        # repeat for latitude
-        split_degy = math.modf(latitude)
-        degrees_y = int(split_degy[1])
-        minutes_y = abs(int(math.modf(split_degy[0] * 60)[1]))
-        seconds_y = abs(round(math.modf(split_degy[0] * 60)[0] * 60,2))
-
-        # account for E/W & N/S
-        if longitude < 0:
-            EorW = "W"
-        else:
-            EorW = "E"
-
-        if latitude < 0:
-            NorS = "S"
-        else:
-            NorS = "N"
-
-        # abs() remove negative from degrees, was only needed for if-else above
-        output = (NorS + str(abs(round(degrees_y))).zfill(3) + "." + str(round(minutes_y)).zfill(2) + "." + str(seconds_y).zfill(3) + " " + EorW + str(abs(round(degrees_x))).zfill(3) + "." + str(round(minutes_x)).zfill(2) + "." + str(seconds_x).zfill(3))
-        return output
 
 class Builder:
     '''Class to build sct files from the dataframes for POSCON'''
 
-    def __init__(self, fileImport=0):
+    def __init__(self, fileImport=0, arrow=True, positions=False, cutout_workers=None, rebuild=False, cutouts=None):
         self.mapCentre = "+53.7-1.5"
+        self.positions = positions
+        self.cutouts = cutouts or []
+        self.cutout_workers = cutout_workers
+        self.rebuild = rebuild
+        self.services = None
         # if there are dataframe files present then use those, else run the webscraper
         if fileImport == 1:
-            scrape = []
-            scrape.append(pd.read_csv('Dataframes/Ad01.csv', index_col=0))          #0
-            scrape.append(pd.read_csv('Dataframes/Ad02-Runways.csv', index_col=0))  #1
-            scrape.append(pd.read_csv('Dataframes/Ad02-Services.csv', index_col=0)) #2
-            scrape.append(pd.read_csv('Dataframes/Enr016.csv', index_col=0))        #3
-            scrape.append(pd.read_csv('DataFrames/Enr021-FIR.csv', index_col=0))    #4
-            scrape.append(pd.read_csv('DataFrames/Enr021-UIR.csv', index_col=0))    #5
-            scrape.append(pd.read_csv('DataFrames/Enr021-CTA.csv', index_col=0))    #6
-            scrape.append(pd.read_csv('DataFrames/Enr021-TMA.csv', index_col=0))    #7
-            scrape.append(pd.read_csv('DataFrames/Enr022-ATZ.csv', index_col=0))    #8
-            scrape.append(pd.read_csv('DataFrames/Enr031.csv', index_col=0))        #9
-            scrape.append(pd.read_csv('DataFrames/Enr033.csv', index_col=0))        #10
-            scrape.append(pd.read_csv('DataFrames/Enr035.csv', index_col=0))        #11
-            scrape.append(pd.read_csv('DataFrames/Enr041.csv', index_col=0))        #12
-            scrape.append(pd.read_csv('DataFrames/Enr044.csv', index_col=0))        #13
-            scrape.append(pd.read_csv('DataFrames/Enr051.csv', index_col=0))        #14
-            scrape.append(pd.read_csv('Dataframes/Ad0217-ATS.csv', index_col=0)) #15
-            scrape.append(pd.read_csv('DataFrames/AccUac.csv', index_col=0))        #16
-            self.scrape = scrape
+            # boundaries and routes are loaded as lists, from the Arrow files if they are up to date. Tables are only
+            # loaded when a section that uses them has to be rendered
+            self.scrape = storage.TableLoader('Dataframes', arrow)
         else:
             initWebscrape = Webscrape()
             self.scrape = initWebscrape.run()
 
-    def run(self):
-        """Build the SCT file"""
-        sct_file = "Build/EGxx_FIR.sct"
-
-        def dms2dd(coord_group):
-            """Convert dms to dd - N57.12.14.80 W002.12.05.88"""
-
-            # split coord group into lat lon
-            group_split = str(coord_group).split(" ")
-            lat = re.match(r"([N|S])([\d]{2})\.([\d]{2})\.([\d]{2})\.([\d]{2})", group_split[0])
-            lon = re.match(r"([E|W])([\d]{3})\.([\d]{2})\.([\d]{2})\.([\d]{2})", group_split[1])
-
-            lat_dd = lat.group(2)
-            lat_mm = lat.group(3)
-            lat_ss = lat.group(4) + "." + lat.group(5)
-
-            # lat N or S (+/-) lon E or W (+/-)
-
-            lat_out = int(lat_dd) + int(lat_mm) / 60 + float(lat_ss) / 3600
-
-            lon_dd = lon.group(2)
-            lon_mm = lon.group(3)
-            lon_ss = lon.group(4) + "." + lon.group(5)
-
-            lon_out = int(lon_dd) + int(lon_mm) / 60 + float(lon_ss) / 3600
+    def services_index(self):
+        """Returns the AD-2 services as a dict of DataFrames keyed on (icao_designator, callsign_type)"""
+        if self.services is None:
+            self.services = dict(tuple(self.scrape[2].groupby(['icao_designator', 'callsign_type'], sort=False)))
+        return self.services
 
-            if lat.group(1) == "S":
-                lat_out = lat_out - (lat_out * 2)
-            if lon.group(1) == "W":
-                lon_out = lon_out - (lon_out * 2)
-
-            return [lat_out, lon_out]
-
-        def dd2dms(latitude, longitude, dd_type=0):
-
-            # math.modf() splits whole number and decimal into tuple
-            # eg 53.3478 becomes (0.3478, 53)
-            split_degx = math.modf(longitude)
-            
-            # the whole number [index 1] is the degrees
-            degrees_x = int(split_degx[1])
-
-            # multiply the decimal part by 60: 0.3478 * 60 = 20.868
-            # split the whole number part of the total as the minutes: 20
-            # abs() absoulte value - no negative
-            minutes_x = abs(int(math.modf(split_degx[0] * 60)[1]))
-
-            # multiply the decimal part of the split above by 60 to get the seconds
-            # 0.868 x 60 = 52.08, round excess decimal places to 2 places
-            # abs() absoulte value - no negative
-            seconds_x = abs(round(math.modf(split_degx[0] * 60)[0] * 60,2))
-
-            # repeat for latitude
-            split_degy = math.modf(latitude)
-            degrees_y = int(split_degy[1])
-            minutes_y = abs(int(math.modf(split_degy[0] * 60)[1]))
-            seconds_y = abs(round(math.modf(split_degy[0] * 60)[0] * 60,2))
-
-            # account for E/W & N/S
-            if longitude < 0:
-                EorW = "W"
-            else:
-                EorW = "E"
-
-            if latitude < 0:
-                NorS = "S"
-            else:
-                NorS = "N"
-
-            # abs() remove negative from degrees, was only needed for if-else above
-            output = (NorS + str(abs(round(degrees_y))).zfill(3) + "." + str(round(minutes_y)).zfill(2) + "." + str(seconds_y).zfill(3) + " " + EorW + str(abs(round(degrees_x))).zfill(3) + "." + str(round(minutes_x)).zfill(2) + "." + str(seconds_x).zfill(3))
-            return output
-
-        def extended_centerline(start_coord, runway_heading, line_length=10):
-            """Generate the extended center line from the runway threshold. Line length in NM"""
-
-            # convert start coords to dd
-            coords = dms2dd(start_coord)
-
-            # calculate the back bearing
-            back_bearing = ((runway_heading + 180) % 360)
-
-            # convert NM to meters (1852m = 1NM)
-            distance_meters = line_length * 1852
-
-            start_of_centerline = Geodesic.WGS84.Direct(coords[0], coords[1], back_bearing, distance_meters)
-            sct_start_of_line_lat_lon = dd2dms(start_of_centerline["lat2"], start_of_centerline["lon2"])
+    @staticmethod
+    def segment_lines(df, colour):
+        """Returns an SCT line for every pair of consecutive points of each boundary, built for the whole table at once"""
+        points = df[['name', 'boundary']].reset_index(drop=True).explode('boundary')
+        row = points.index.to_numpy()
+        point = points['boundary'].to_numpy()
 
-            ticks = []
-            marker = 0
-            while marker <= line_length:
-                dst_from_start = (line_length - marker) * 1852
-                right_angle = ((runway_heading + 90) % 360)
-                left_angle = ((right_angle + 180) % 360)
-                center_of_tick = Geodesic.WGS84.Direct(coords[0], coords[1], back_bearing, dst_from_start)
-                left_tick = Geodesic.WGS84.Direct(center_of_tick["lat2"], center_of_tick["lon2"], right_angle, 200)
-                right_tick = Geodesic.WGS84.Direct(center_of_tick["lat2"], center_of_tick["lon2"], left_angle, 200)
+        # each point is joined to the next one if they are both from the same boundary
+        joined = row[:-1] == row[1:]
+        names = pd.Series(points['name'].to_numpy()[:-1][joined], dtype=object)
+        return (names + "\t" + point[:-1][joined] + "\t" + point[1:][joined] + colour + "\n").tolist()
 
-                sct_left_tick = dd2dms(left_tick["lat2"], left_tick["lon2"])
-                sct_right_tick = dd2dms(right_tick["lat2"], right_tick["lon2"])
-                tick = f"{sct_left_tick} {sct_right_tick}"
-                ticks.append(tick)
-                marker += 1
+    @staticmethod
+    def route_lines(df, colour=""):
+        """Returns an SCT line for each airway, with every point of the route separated by tabs"""
+        routes = df['route'].str.join("\t")
+        return (df['name'] + "\t" + routes + "\t" + colour + "\n").tolist()
 
-            return [sct_start_of_line_lat_lon, ticks]
+    def run(self):
+        """Build the SCT file"""
+        sct_file = "Build/EGxx_FIR.sct"
 
         def rematch(ft, line):
                 """re.match strings"""
@@ -1114,10 +1262,11 @@ class Builder:
                 else:
                     raise ValueError(f"{ft} has not been recognised")
 
+        custom_airfields = ["EGSS", "EGSC"]
+
         def custom_list(file, file_type):
-            """modify UK_AIRFIELDS.txt to use custom built sector files where available"""
+            """modify UK_AIRFIELDS.txt to use custom built sector files where available, yields the lines to write"""
 
-            custom_airfields = ["EGSS", "EGSC"]
             ignore_line = True
             label_match = False
             
@@ -1126,21 +1275,19 @@ class Builder:
                 for line in original_file:
                     if (file_type == "GEO") or (file_type == "FREETEXT"):
                         if not any(custom_airfields in line for custom_airfields in custom_airfields):
-                            with open(sct_file, 'a') as write_sct_file:
-                                write_sct_file.write(line)
+                            yield line
                     elif file_type == "REGIONS":
                         if not label_match: # if we're looking for a matching line, print the line
                             for airfield in custom_airfields:
-                                if re.match(f"A-{airfield}", line):
+                                if line.startswith(f"A-{airfield}"):
                                     label_match = True
                             if not label_match: # if the line doesn't match the search string then print the line
-                                with open(sct_file, 'a') as write_sct_file:
-                                    write_sct_file.write(line)
+                                yield line
                         elif label_match:
                             counter = 0
-                            if re.match(r"A\-", line):
+                            if line.startswith("A-"):
                                 for airfield in custom_airfields:
-                                    if not re.match(airfield, line):
+                                    if not line.startswith(airfield):
                                         counter += 1
                                 if counter == len(custom_airfields):
                                     label_match = False
@@ -1156,86 +1303,65 @@ class Builder:
                             if rematch(file_type, line): # once we get to the defined tag
                                 label_match = True
                         elif label_match and print_line:
-                            with open(sct_file, 'a') as write_sct_file:
-                                if re.match(r"\[.*\]", line): # stop whenever we get to the next tag
-                                    write_sct_file.write("\n")
-                                    print_line = False
-                                else:
-                                    write_sct_file.write(line)
+                            if re.match(r"\[.*\]", line): # stop whenever we get to the next tag
+                                yield "\n"
+                                print_line = False
+                            else:
+                                yield line
 
         def sct_writer(filename):
-            """Write to SCT file"""        
-            with open(sct_file, 'a') as write_sct_file:
-                with open(filename, 'r') as hdr:
-                    lines = hdr.readlines()
-                    for line in lines:
-                        write_sct_file.write(line)
-                write_sct_file.write('\n\n')
+            """Yields the lines of a text file to copy into the SCT file"""
+            with open(filename, 'r') as hdr:
+                yield from hdr
+            yield '\n\n'
 
         def build_artcc(idx, section, range_lo, range_hi):
-            with open(sct_file, 'a') as write_sct_file:
-                line_colour = {
-                    "4": "Blue",
-                    "16": "Silver",
-                    "7": "Grey",
-                    "6": "Navy",
-                    "8": "Black",
-                    "15": "Olive"
-                }
-                write_sct_file.write(f'[{section}]\nRANGE {range_lo} {range_hi}\n')
-                df = self.scrape[idx]
-                for index, row in df.iterrows():
-                    boundary = row['boundary']
-                    draw_line = boundary.split('/')
-                    n = 0
-                    while n < len(draw_line):
-                        if (n + 1) < len(draw_line):
-                            write_sct_file.write(f"{row['name']}\t{draw_line[n]}\t{draw_line[n+1]} {line_colour[str(idx)]}\n")
-                        n += 1
-                write_sct_file.write('\n')
-
-        # Check if file exists and delete
-        if os.path.exists(sct_file):
-            os.remove(sct_file)
-
-        # Headers
-        print("Adding headers...")
-        sct_writer('DataFrames/HEADER.txt')
-        sct_writer('DataFrames/INFO.txt')
-
-        # VOR section
-        print("Adding VOR beacons...")
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[VOR]\nRANGE 10 3000\n')
+            line_colour = {
+                "4": "Blue",
+                "16": "Silver",
+                "7": "Grey",
+                "6": "Navy",
+                "8": "Black",
+                "15": "Olive"
+            }
+            yield f'[{section}]\nRANGE {range_lo} {range_hi}\n'
+            yield "".join(self.segment_lines(self.scrape[idx], f" {line_colour[str(idx)]}"))
+            yield '\n'
+
+        def headers():
+            print("Adding headers...")
+            yield from sct_writer('DataFrames/HEADER.txt')
+            yield from sct_writer('DataFrames/INFO.txt')
+
+        def vor():
+            print("Adding VOR beacons...")
+            yield '[VOR]\nRANGE 10 3000\n'
             df = self.scrape[12]
             for index, row in df.iterrows():
-                write_sct_file.write(f"{row['name']} {row['freq']} {row['coords']}\n")
-            write_sct_file.write('\n')
+                yield f"{row['name']} {row['freq']} {row['coords']}\n"
+            yield '\n'
         
         # NDB section
 
-        # AIRPORT section !!!AERODROME AIRSPACE CLASS NEEDS ENTERING PROPERLY - E AS A HOLDING CLASS!!!
-        print("Adding airports...")
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[AIRPORT]\nRANGE 10 500\n')
+        def airports():
+            # AIRPORT section !!!AERODROME AIRSPACE CLASS NEEDS ENTERING PROPERLY - E AS A HOLDING CLASS!!!
+            print("Adding airports...")
+            yield '[AIRPORT]\nRANGE 10 500\n'
             df = self.scrape[0]
             df_filter = df.loc[df['verified'] == 1]
             for index, row in df_filter.iterrows():
                 # select tower frequency
-                df_services = self.scrape[2]
-                df_services_filter = df_services.loc[(df_services['icao_designator'] == row['icao_designator']) & (df_services['callsign_type'] == "TOWER")]
-                df_services_count = len(df_services_filter)
-                if df_services_count >= 1:
+                df_services_filter = self.services_index().get((row['icao_designator'], "TOWER"))
+                if df_services_filter is not None:
                     for s_index, s_row in df_services_filter.iterrows():
-                        write_sct_file.write(f"{row['icao_designator']}\t{s_row['frequency']}\t{row['location']}\tE\t;{row['name']}\n")
+                        yield f"{row['icao_designator']}\t{s_row['frequency']}\t{row['location']}\tE\t;{row['name']}\n"
                 else:
-                    write_sct_file.write(f"{row['icao_designator']}\t000.000\t{row['location']}\tE\t;{row['name']}\n")
-            write_sct_file.write('\n')
+                    yield f"{row['icao_designator']}\t000.000\t{row['location']}\tE\t;{row['name']}\n"
+            yield '\n'
 
-        # RUNWAY section
-        print("Adding runways...")
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[RUNWAY]\nRANGE 0 500\n')
+        def runways():
+            print("Adding runways...")
+            yield '[RUNWAY]\nRANGE 0 500\n'
             df = self.scrape[1]
             flip_flop = True
             for index, row in df.iterrows():
@@ -1245,218 +1371,188 @@ class Builder:
                     s_loc = row['location']
                     flip_flop = False
                 else:
-                    write_sct_file.write(f"{s_rwy}\t{row['runway']}\t{s_bearing}\t{row['bearing']}\t{s_loc}\t{row['location']}\t{row['icao_designator']}\n")
+                    yield f"{s_rwy}\t{row['runway']}\t{s_bearing}\t{row['bearing']}\t{s_loc}\t{row['location']}\t{row['icao_designator']}\n"
                     flip_flop = True
-            write_sct_file.write('\n')
+            yield '\n'
 
-        # FIXES section
-        print("Adding fixes...")
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[FIXES]\nRANGE 0 200\n')
+        def fixes():
+            print("Adding fixes...")
+            yield '[FIXES]\nRANGE 0 200\n'
             df = self.scrape[13]
             for index, row in df.iterrows():
-                write_sct_file.write(f"{row['name']}\t{row['coords']}\n")
-            write_sct_file.write('\n')
+                yield f"{row['name']}\t{row['coords']}\n"
+            yield '\n'
 
-        # ARTCC section FIR
-        print("Adding ARTCC...")
-        build_artcc(4, "ARTCC", "0", "20000") # FIR
+        def artcc():
+            # ARTCC section FIR
+            print("Adding ARTCC...")
+            yield from build_artcc(4, "ARTCC", "0", "20000") # FIR
 
-        # ARTCC HIGH section TMA
-        print("Adding ARTCC HIGH...")
-        build_artcc(7, "ARTCC HIGH", "100", "1000") # TMA
-        #build_artcc(16, "ARTCC HIGH", "500", "3000") # ACC/UAC
+            # ARTCC HIGH section TMA
+            print("Adding ARTCC HIGH...")
+            yield from build_artcc(7, "ARTCC HIGH", "100", "1000") # TMA
+            #yield from build_artcc(16, "ARTCC HIGH", "500", "3000") # ACC/UAC
 
-        # ARTCC LOW section CTA
-        print("Adding ARTCC LOW...")
-        build_artcc(6, "ARTCC LOW", "0", "500") # CTA
-        build_artcc(8, "ARTCC LOW", "0", "200") # ATZ
-        build_artcc(15, "ARTCC LOW", "0", "150") # ATS
+            # ARTCC LOW section CTA
+            print("Adding ARTCC LOW...")
+            yield from build_artcc(6, "ARTCC LOW", "0", "500") # CTA
+            yield from build_artcc(8, "ARTCC LOW", "0", "200") # ATZ
+            yield from build_artcc(15, "ARTCC LOW", "0", "150") # ATS
 
         # SID section
 
         # STAR section
 
-        # LOW AIRWAY section
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[LOW AIRWAY]\nRANGE 10 200\n')
-            write_sct_file.write(';ENR-3.3\n')
-            df = self.scrape[10]
-            for index, row in df.iterrows():
-                route = row['route']
-                split_route = route.split('/')
-                full_route = ''
-                for point in split_route:
-                    full_route += f"{point}\t"
-                write_sct_file.write(f"{row['name']}\t{full_route}\tGreen\n")
-            write_sct_file.write('\n')
-
-        # HIGH AIRWAY section
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[HIGH AIRWAY]\nRANGE 10 3000\n')
-            write_sct_file.write(';ENR-3.1\n')
-            df = self.scrape[9]
-            for index, row in df.iterrows():
-                route = row['route']
-                split_route = route.split('/')
-                full_route = ''
-                for point in split_route:
-                    full_route += f"{point}\t"
-                write_sct_file.write(f"{row['name']}\t{full_route}\n")
-            
-            write_sct_file.write(';ENR-3.5\n')
-            df = self.scrape[11]
-            for index, row in df.iterrows():
-                route = row['route']
-                split_route = route.split('/')
-                full_route = ''
-                for point in split_route:
-                    full_route += f"{point}\t"
-                write_sct_file.write(f"{row['name']}\t{full_route}\n")
-            write_sct_file.write('\n')
-
-        # GEO section
-        print("Adding GEO...")
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[GEO]\nRANGE 0 20000\n')
-        # UK Geographic Boundary
-        sct_writer('DataFrames/UK_NOAA_GEO.txt')
-        # Runway Center Lines
-        major_airports = [
-            "EGPD",
-            "EGAA",
-            "EGAC",
-            "EGKB",
-            "EGBB",
-            "EGHH",
-            "EGDD",
-            "EGSC",
-            "EGFF",
-            "EGTC",
-            "EGNX",
-            "EGPH",
-            "EGLF",
-            "EGPE",
-            "EGNM",
-            "EGGP",
-            "EGLC",
-            "EGKK",
-            "EGLL",
-            "EGGW",
-            "EGSS",
-            "EGCC",
-            "EGNT",
-            "EGHQ",
-            "EGSH",
-            "EGHI",
-            "EGPB",
-            "EGNV"
-        ]
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write(f'; Runway Extended Center Lines\nRANGE 5 100\n')
-            file_in = 'Dataframes/Ad02-Runways.csv'
-            df_centerline = pd.read_csv(file_in, index_col=0)
-
-            for index, row in df_centerline.iterrows():
-                write_sct_file.write(f"; Extended Center Line for {row['icao_designator']} Rwy {row['runway']}\n")
-                location = row['location']
-                bearing = row['bearing']
-                if row['icao_designator'] in major_airports:
-                    start = extended_centerline(location, bearing)
-                else:
-                    start = extended_centerline(location, bearing, 2)
-                write_sct_file.write(f"{row['icao_designator']}\t{start[0]}\t{location}\tWhite\n")
-                for tick in start[1]:
-                    write_sct_file.write(f"{row['icao_designator']}\t{tick}\tWhite\n")
-                write_sct_file.write('\n')
-        # ENR-5.1 DANGER / RESTRICTED areas
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write(f';ENR-5.1\nRANGE 0 500\n')
-            df = self.scrape[14]
-            for index, row in df.iterrows():
-                boundary = row['boundary']
-                draw_line = boundary.split('/')
-                n = 0
-                while n < len(draw_line):
-                    if (n + 1) < len(draw_line):
-                        write_sct_file.write(f"{row['name']}\t{draw_line[n]}\t{draw_line[n+1]}\tRed\n")
-                    n += 1
-            write_sct_file.write('\n')
-        # UK Airfields
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('\nRANGE 0 20\n')
-        custom_list('Airfields/UK_AIRFIELDS.txt', 'GEO')
-
-        # REGIONS section
-        print("Adding regions...")
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[REGIONS]\nRANGE 0 20\n')
-        # UK Airfields
-        custom_list('Airfields/UK_AIRFIELD_REGIONS.txt', 'REGIONS')
-
-        # FREETEXT (labels) section
-        print("Adding freetext...")
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('[FREETEXT]\n')
+        def airways():
+            # LOW AIRWAY section
+            yield '[LOW AIRWAY]\nRANGE 10 200\n'
+            yield ';ENR-3.3\n'
+            yield "".join(self.route_lines(self.scrape[10], "\tGreen"))
+            yield '\n'
+
+            # HIGH AIRWAY section
+            yield '[HIGH AIRWAY]\nRANGE 10 3000\n'
+            yield ';ENR-3.1\n'
+            yield "".join(self.route_lines(self.scrape[9]))
+            yield ';ENR-3.5\n'
+            yield "".join(self.route_lines(self.scrape[11]))
+            yield '\n'
+
+        def geo():
+            print("Adding GEO...")
+            yield '[GEO]\nRANGE 0 20000\n'
+            # UK Geographic Boundary
+            yield from sct_writer('DataFrames/UK_NOAA_GEO.txt')
+
+        def geo_centerlines():
+            # Runway Center Lines, every tick of every runway is generated in one batch
+            yield f'; Runway Extended Center Lines\nRANGE 5 100\n'
+            df_centerline = self.scrape[1]
+            starts, ticks = centerlines.build_centerlines(df_centerline, centerlines.load_config('Dataframes/Centerlines.csv'))
+
+            for (index, row), start, runway_ticks in zip(df_centerline.iterrows(), starts, ticks):
+                yield f"; Extended Center Line for {row['icao_designator']} Rwy {row['runway']}\n"
+                yield f"{row['icao_designator']}\t{start}\t{row['location']}\tWhite\n"
+                for tick in runway_ticks:
+                    yield f"{row['icao_designator']}\t{tick}\tWhite\n"
+                yield '\n'
+
+        def geo_danger_areas():
+            # ENR-5.1 DANGER / RESTRICTED areas
+            yield f';ENR-5.1\nRANGE 0 500\n'
+            yield "".join(self.segment_lines(self.scrape[14], "\tRed"))
+            yield '\n'
+
+        def geo_airfields():
+            # UK Airfields
+            yield '\nRANGE 0 20\n'
+            yield from custom_list('Airfields/UK_AIRFIELDS.txt', 'GEO')
+
+        def regions():
+            print("Adding regions...")
+            yield '[REGIONS]\nRANGE 0 20\n'
+            # UK Airfields
+            yield from custom_list('Airfields/UK_AIRFIELD_REGIONS.txt', 'REGIONS')
+
+        def freetext():
+            # FREETEXT (labels) section
+            print("Adding freetext...")
+            yield '[FREETEXT]\n'
         
-        # VOR labels
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write(';VOR Names\nRANGE:10:1000\n')
+            # VOR labels
+            yield ';VOR Names\nRANGE:10:1000\n'
             df_enr044 = self.scrape[12]
             for index, row in df_enr044.iterrows():
                 coords = row['coords']
-                write_sct_file.write(f"{coords.replace(' ', ':')}:VOR:{row['name']}\n")
-            write_sct_file.write('\n')
-        
-        # AIRFIELD labels
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write(';Airfield Labels\nRANGE:0:5\n')
-        custom_list('Airfields/UK_AIRFIELD_LABELS.txt', 'FREETEXT')
-
-        # POSITIONS section <name of position>:<radio callsign>:<frequency>:<identifier>:<middle letter>:<prefix>:<suffix>:<not used>:<not used>:<A code start of range>:<A code end of range>[:<VIS center1 latitude>:<VIS center1 longitude>[: ... ]]
-        """
-        The name of the position can be anything used to help in identifying the line inside the ESE file.
-        Radio callsign shall be the official radiotelephony callsign that shall be used for that station.
-        Frequency shall be in full with “.” as decimal separator.
-        The identifier is used in many places in the software and may be as short as one character and as long as required.
-        Prefix and suffix are the first and last parts of the callsign used to identify the position.
-        A code ranges are used to preset the assignment A code ranges from which the system will assign the codes for a specific position.
-        Optionally there can be some visibility centers defined for the position.
-            One center can be defined by two parameters: latitude and longitude.
-            There can be maximum 4 visibility centers defined (that is altogether 8 optional elements in the line)
-        """
-        """print("Adding positions...")
-        with open(sct_file, 'a') as write_sct_file:
-            write_sct_file.write('\n\n[POSITIONS]\n')
-            list_positions = ["APPROACH", "GROUND", "DELIVERY", "TOWER", "DIRECTOR", "RADIO", "RADAR"] # don't include INFORMATION as this is a non-controlled automatic position
+                yield f"{coords.replace(' ', ':')}:VOR:{row['name']}\n"
+            yield '\n'
+
+        def freetext_airfields():
+            # AIRFIELD labels
+            yield ';Airfield Labels\nRANGE:0:5\n'
+            yield from custom_list('Airfields/UK_AIRFIELD_LABELS.txt', 'FREETEXT')
+
+        def positions():
+            # POSITIONS section <name of position>:<radio callsign>:<frequency>:<identifier>:<middle letter>:<prefix>:<suffix>:<not used>:<not used>:<A code start of range>:<A code end of range>[:<VIS center1 latitude>:<VIS center1 longitude>[: ... ]]
+            """
+            The name of the position can be anything used to help in identifying the line inside the ESE file.
+            Radio callsign shall be the official radiotelephony callsign that shall be used for that station.
+            Frequency shall be in full with “.” as decimal separator.
+            The identifier is used in many places in the software and may be as short as one character and as long as required.
+            Prefix and suffix are the first and last parts of the callsign used to identify the position.
+            A code ranges are used to preset the assignment A code ranges from which the system will assign the codes for a specific position.
+            Optionally there can be some visibility centers defined for the position.
+                One center can be defined by two parameters: latitude and longitude.
+                There can be maximum 4 visibility centers defined (that is altogether 8 optional elements in the line)
+            """
+            print("Adding positions...")
+            yield '\n\n[POSITIONS]\n'
+            # don't include INFORMATION as this is a non-controlled automatic position
+            list_positions = {
+                "APPROACH": "INT",
+                "GROUND": "GMC",
+                "DELIVERY": "GMP",
+                "TOWER": "TWR",
+                "DIRECTOR": "FIN",
+                "RADIO": "RDO",
+                "RADAR": "RAD"
+            }
             df = self.scrape[0]
             df_filter = df.loc[df['verified'] == 1]
             for index, row in df_filter.iterrows():
-                for pos in list_positions:
-                    df_services = self.scrape[2]
-                    df_services_filter = df_services.loc[(df_services['icao_designator'] == row['icao_designator']) & (df_services['callsign_type'] == pos)]
+                for pos, short_pos in list_positions.items():
+                    df_services_filter = self.services_index().get((row['icao_designator'], pos))
+                    if df_services_filter is None:
+                        continue
                     num = 1
                     for s_index, s_row in df_services_filter.iterrows():
-                        s_pos = s_row['callsign_type']
-                        split_icao = Webscrape.split(row['icao_designator'])
-                        if s_pos == "APPROACH":
-                            short_pos = "INT"
-                        elif s_pos == "GROUND":
-                            short_pos = "GMC"
-                        elif s_pos == "DELIVERY":
-                            short_pos = "GMP"
-                        elif s_pos == "TOWER":
-                            short_pos = "TWR"
-                        elif s_pos == "DIRECTOR":
-                            short_pos = "FIN"
-                        elif s_pos == "RADIO":
-                            short_pos = "RDO"
-                        elif s_pos == "RADAR":
-                            short_pos = "RAD"
+                        split_icao = row['icao_designator']
                         callsign = f"{split_icao[2]}{split_icao[3]}{short_pos}{num}"
-                        write_sct_file.write(f"{row['icao_designator']} {row['name']} {pos}:{callsign}:{s_row['frequency']}:{callsign}:{num}:{row['icao_designator']}:{short_pos}:0401:7617\n")
+                        yield f"{row['icao_designator']} {row['name']} {pos}:{callsign}:{s_row['frequency']}:{callsign}:{num}:{row['icao_designator']}:{short_pos}:0401:7617\n"
                         num += 1
-            write_sct_file.write('\n')"""
+            yield '\n'
+
+        def tables(*idx):
+            return [storage.csv_file('Dataframes', storage.TABLES[i]) for i in idx]
+
+        # every section with the files it is built from
+        custom_files = [f"CustomAirfields\\{airfield}.sct" for airfield in custom_airfields]
+        sections = [
+            ("headers", headers, ['DataFrames/HEADER.txt', 'DataFrames/INFO.txt']),
+            ("vor", vor, tables(12)),
+            ("airports", airports, tables(0, 2)),
+            ("runways", runways, tables(1)),
+            ("fixes", fixes, tables(13)),
+            ("artcc", artcc, tables(4, 7, 6, 8, 15)),
+            ("airways", airways, tables(10, 9, 11)),
+            ("geo", geo, ['DataFrames/UK_NOAA_GEO.txt']),
+            ("geo-centerlines", geo_centerlines, ['Dataframes/Centerlines.csv'] + tables(1)),
+            ("geo-danger-areas", geo_danger_areas, tables(14)),
+            ("geo-airfields", geo_airfields, ['Airfields/UK_AIRFIELDS.txt'] + custom_files),
+            ("regions", regions, ['Airfields/UK_AIRFIELD_REGIONS.txt'] + custom_files),
+            ("freetext", freetext, tables(12)),
+            ("freetext-airfields", freetext_airfields, ['Airfields/UK_AIRFIELD_LABELS.txt'] + custom_files)
+            ]
+        if self.positions:
+            sections.append(("positions", positions, tables(0, 2)))
+
+        # sections which haven't changed since the last build are copied from the fragments of that build
+        cache = SectionCache("Build/Fragments", self.rebuild)
+        tmp_file = f"{sct_file}.tmp"
+        with open(tmp_file, 'wb') as write_sct_file:
+            for name, render, inputs in sections:
+                with open(cache.fragment(name, render, inputs), 'rb') as fragment:
+                    shutil.copyfileobj(fragment, write_sct_file, SCT_BUFFER)
+        cache.save()
+        os.replace(tmp_file, sct_file)
+        print(f"Rendered {len(cache.rendered)} of {len(sections)} sections")
+
+        # local files only holding what is inside each area, cut out of the full file
+        if self.cutouts:
+            airports = cutout.airport_locations(self.scrape[0])
+            areas = [cutout.parse_area(spec, airports) for spec in self.cutouts]
+            print(f"Cutting out {len(areas)} local files...")
+            cutout.build_cutouts(sct_file, areas, "Build/Local", self.cutout_workers, dataframes="Dataframes")
 
 # Build command line argument parser
 cmdParse = argparse.ArgumentParser(description="Application to collect data from an AIRAC source and build that into sct files for use on POSCON")
@@ -1465,6 +1561,17 @@ cmdParse.add_argument('-b', '--build', help='build xml file from database', acti
 cmdParse.add_argument('-g', '--geo', help='NoOp', action='store_true')
 cmdParse.add_argument('-d', '--debug', help='NoOp', action='store_true')
 cmdParse.add_argument('-v', '--verbose', action='store_true')
+cmdParse.add_argument('-w', '--workers', help='number of pages to download at the same time', type=int, default=8)
+cmdParse.add_argument('--cache-cycles', help='number of AIRAC cycles to keep in the page cache, including the current one (at least 2 with --diff)', type=int, default=3)
+cmdParse.add_argument('--no-cache', help='always download pages from the eAIP', action='store_true')
+cmdParse.add_argument('--arc-tolerance', help='maximum distance (m) between a drawn arc and the true arc, 0 draws a point every degree', type=float, default=arcs.ARC_TOLERANCE)
+cmdParse.add_argument('--diff', help='only parse the pages which have changed since the previous AIRAC cycle (if it was also scraped with --diff) and write Changelog.json', action='store_true')
+cmdParse.add_argument('--arrow', help='also save the dataframes as Arrow files, which load faster on build (needs pyarrow)', action='store_true')
+cmdParse.add_argument('--positions', help='add the [POSITIONS] section to the built file', action='store_true')
+cmdParse.add_argument('--rebuild', help='render every section of the built file again, even if nothing has changed', action='store_true')
+cmdParse.add_argument('--cutout', help='also build Build/Local/<area>.sct holding only what is inside an area - ICAO[@radius NM], lat,lon[@radius NM] or min_lat,min_lon,max_lat,max_lon. Can be given more than once', action='append')
+cmdParse.add_argument('--cutout-workers', help='number of processes to cut the local files with, defaults to the number of cores', type=int)
+cmdParse.add_argument('--csv', help='build from the CSV dataframes even if there are Arrow files', action='store_true')
 args = cmdParse.parse_args()
 
 if args.geo:
@@ -1474,12 +1581,12 @@ elif args.debug:
 elif args.scrape:
     shutil.rmtree(f'{work_dir}\\Build')
     os.mkdir(f'{work_dir}\\Build')
-    new = Webscrape()
+    new = Webscrape(workers=args.workers, cache_dir=None if args.no_cache else "Cache", cache_cycles=args.cache_cycles, arc_tolerance=args.arc_tolerance, arrow=args.arrow, diff=args.diff)
     new.run()
 elif args.build:
-    shutil.rmtree(f'{work_dir}\\Build')
-    os.mkdir(f'{work_dir}\\Build')
-    new = Builder(1)
+    # Build is kept between builds, it holds the sections which don't need rendering again
+    os.makedirs('Build', exist_ok=True)
+    new = Builder(1, arrow=not args.csv, positions=args.positions, cutout_workers=args.cutout_workers, rebuild=args.rebuild, cutouts=args.cutout)
     new.run()
 else:
     new = Airac()
@@ -1,213 +1,304 @@
-import awkward as ak
+"""Converts the OSM GeoJSON files in AirfieldGeoJson to the GEO, REGIONS and FREETEXT lines used by generate.py
+
+Each airfield is converted on its own, across a process pool, and the results are written to the Airfields files
+in file name order so the output is the same however many processes are used. The result for each airfield is kept
+in Airfields/Fragments along with a hash of its GeoJSON file, so only the airfields which have been edited since the
+last run are converted again.
+"""
+import argparse
+import json
 import math
 import os
-import shutil
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+from shapely.geometry import LineString, Polygon
 
-from time import sleep
+import coordinates
+import fragments
+from coordinates import format_dms
+from fragments import FragmentCache, code_version
 
 work_dir = os.getcwd()
 
-def dd2dms(latitude, longitude):
-
-    # math.modf() splits whole number and decimal into tuple
-    # eg 53.3478 becomes (0.3478, 53)
-    split_degx = math.modf(longitude)
-    
-    # the whole number [index 1] is the degrees
-    degrees_x = int(split_degx[1])
-
-    # multiply the decimal part by 60: 0.3478 * 60 = 20.868
-    # split the whole number part of the total as the minutes: 20
-    # abs() absoulte value - no negative
-    minutes_x = abs(int(math.modf(split_degx[0] * 60)[1]))
-
-    # multiply the decimal part of the split above by 60 to get the seconds
-    # 0.868 x 60 = 52.08, round excess decimal places to 2 places
-    # abs() absoulte value - no negative
-    seconds_x = abs(round(math.modf(split_degx[0] * 60)[0] * 60,2))
-
-    # repeat for latitude
-    split_degy = math.modf(latitude)
-    degrees_y = int(split_degy[1])
-    minutes_y = abs(int(math.modf(split_degy[0] * 60)[1]))
-    seconds_y = abs(round(math.modf(split_degy[0] * 60)[0] * 60,2))
-
-    # account for E/W & N/S
-    if longitude < 0:
-        EorW = "W"
+# combined files, in the order convert_airfield returns their text
+OUTPUT_FILES = ["Airfields/UK_AIRFIELD_REGIONS.txt", "Airfields/UK_AIRFIELDS.txt", "Airfields/UK_AIRFIELD_LABELS.txt"]
+
+# size of the write buffer for each combined file
+WRITE_BUFFER = 1024 * 1024
+
+# Douglas-Peucker tolerance (m) for each aeroway, well inside what can be seen at SMR range. Anything not listed,
+# runways and holding points included, is left as surveyed
+SIMPLIFY_TOLERANCE = {
+    "aerodrome": 5.0,
+    "apron": 1.0,
+    "taxiway": 1.0,
+    "parking_position": 0.5,
+    "hangar": 0.5,
+    "terminal": 0.5,
+    "control_tower": 0.5
+}
+
+# metres in a degree of latitude, near enough for a tolerance
+METRES_PER_DEGREE = 111320
+
+# geojson (osm) object types, converted in the reverse of this order
+objects = [
+    "holding_position",
+    "runway",
+    "taxiway",
+    "helipad",
+    "gate",
+    "parking_position",
+    #"navigationaid",
+    "hangar",
+    "control_tower",
+    "terminal",
+    "apron",
+    "aerodrome"
+]
+
+def feature_points(item):
+    """Returns the [lat, lon] of each point of a feature which is written out"""
+    points = []
+    shape = item["type"]
+
+    # set the value of coords
+    if (shape == "Polygon") or (shape == "MultiPolygon"):
+        coords = item["coordinates"][0]
     else:
-        EorW = "E"
+        coords = item["coordinates"]
 
-    if latitude < 0:
-        NorS = "S"
+    # iterate over all the coordinates
+    if shape == "Point":
+        points.append((coords[1], coords[0]))
     else:
-        NorS = "N"
-
-    # abs() remove negative from degrees, was only needed for if-else above
-    output = (NorS + str(abs(degrees_y)).zfill(3) + "." + str(minutes_y).zfill(2) + "." + str(seconds_y).zfill(3) + " " + EorW + str(abs(degrees_x)).zfill(3) + "." + str(minutes_x).zfill(2) + "." + str(seconds_x).zfill(3))
-    return output
-
-# remove archive file(s)
-shutil.rmtree(f'{work_dir}\\Airfields')
-os.mkdir(f'{work_dir}\\Airfields')
-
-# set some vars
-label = False
-
-# load the json files
-json_files = os.listdir(f"{work_dir}\\AirfieldGeoJson\\")
-for j in json_files:
-    print(f"\n\n{j}")
-    airfield_geojson = ak.from_json(f"{work_dir}\\AirfieldGeoJson\\{j}")
-    icao = j.split('.')
-    #icao = f"{icao[0]}{icao[1]}{icao[2]}{icao[3]}"
+        for coord in coords:
+            if len(coord) < 2: # if this is a multi polygon
+                for c in coord[0]:
+                    points.append((c[1], c[0]))
+            elif len(coord) > 2: # if this is a weird multi polygon, the first point is repeated for every other one
+                points.extend([(float(coord[0][1]), float(coord[0][0]))] * ((len(coord) + 1) // 2))
+            else:
+                points.append((coord[1], coord[0]))
+    return points
+
+def simplify_points(points, shape, tolerance):
+    """Simplify a line or closed polygon ring of [lat, lon] points to within tolerance (m), keeping its topology.
+    The points kept are the original ones, so they are written out exactly as they would have been"""
+    if (not tolerance) or (shape not in ("LineString", "Polygon")) or (len(points) < 3):
+        return points
+
+    # metres east and north, close enough over the size of an airfield
+    scale = math.cos(math.radians(sum(point[0] for point in points) / len(points)))
+    xy = [(lon * scale * METRES_PER_DEGREE, lat * METRES_PER_DEGREE) for lat, lon in points]
+    if shape == "Polygon":
+        if (len(points) < 4) or (points[0] != points[-1]):
+            return points
+        simple = Polygon(xy).simplify(tolerance, preserve_topology=True)
+        if simple.is_empty or (simple.geom_type != "Polygon"):
+            return points
+        coords = simple.exterior.coords
+    else:
+        coords = LineString(xy).simplify(tolerance, preserve_topology=True).coords
+
+    index = {point: i for i, point in enumerate(xy)}
+    kept = [index.get(tuple(coord)) for coord in coords]
+    if None in kept:
+        return points
+    return [points[i] for i in kept]
+
+def format_features(point_lists):
+    """Format the points of many features in the dd2dms layout in one go, returns a list of text for each feature"""
+    counts = [len(points) for points in point_lists]
+    points = np.array([point for feature in point_lists for point in feature], dtype=np.float64).reshape(-1, 2)
+    text = format_dms(points[:, 0], points[:, 1]) if len(points) else []
+    ends = np.cumsum(counts)
+    return [text[end - count:end] for end, count in zip(ends, counts)]
+
+def group_features(airfield_geojson):
+    """Returns the (geometry, properties) of every feature grouped by aeroway. Every feature gets every property
+    used anywhere in the file, None where it isn't set, as the properties always had when read through awkward"""
+    properties = dict.fromkeys(key for feature in airfield_geojson["features"] for key in feature["properties"])
+    features = {}
+    for feature in airfield_geojson["features"]:
+        props = {**properties, **feature["properties"]}
+        features.setdefault(props["aeroway"], []).append((feature["geometry"], props))
+    return features
+
+def convert_airfield(filename, simplify=True):
+    """Convert one GeoJSON file, returns its text for UK_AIRFIELD_REGIONS.txt, UK_AIRFIELDS.txt and
+    UK_AIRFIELD_LABELS.txt along with the number of vertices before and after simplifying. Everything is built in
+    memory so each file only gets one write per airfield"""
+    with open(f"{work_dir}\\AirfieldGeoJson\\{filename}") as read_file:
+        airfield_geojson = json.load(read_file)
+    icao = filename.split('.')
+    regions = []
+    airfields = []
+    labels = []
+    # the label is carried from one line to the next, but never from one airfield to the next
+    label = False
     b = 0
 
-    # geojson (osm) object types
-    objects = [
-        "holding_position",
-        "runway",
-        "taxiway",
-        "helipad",
-        "gate",
-        "parking_position",
-        #"navigationaid",
-        "hangar",
-        "control_tower",
-        "terminal",
-        "apron",
-        "aerodrome"
-    ]
-
-    # iterate over all the feature types
-    for obj in reversed(objects):
-        for item, props in zip(ak.to_list(airfield_geojson.features.geometry), ak.to_list(airfield_geojson.features.properties)):
-            if props["aeroway"] == obj:
-                coord_list = []
-                shape = item["type"]
-
-                # set the value of coords
-                if (shape == "Polygon") or (shape == "MultiPolygon"):
-                    coords = item["coordinates"][0]
-                else:
-                    coords = item["coordinates"]
-
-                # iterate over all the coordinates
-                if shape == "Point":
-                    start_dms = dd2dms(coords[1], coords[0])
-                    coord_list.append(start_dms)
-                else:
-                    for coord in coords:
-                        if len(coord) < 2: # if this is a multi polygon
-                            for c in coord[0]:
-                                #print(len(coord), c)
-                                start_dms = dd2dms(c[1], c[0])
-                                coord_list.append(start_dms)
-                        elif len(coord) > 2: # if this is a weird multi polygon
-                            c_count = 0
-                            while c_count < len(coord):
-                                #print(len(coord), coord)
-                                coord_zero = str(coord[0])
-                                coord_zero = coord_zero.strip('[]')
-                                coord_zero = coord_zero.split(',')
-                                start_dms = dd2dms(float(coord_zero[1]), float(coord_zero[0]))
-                                coord_list.append(start_dms)
-                                c_count += 2
-                        else:
-                            #print(len(coord), coord)
-                            start_dms = dd2dms(coord[1], coord[0])
-                            coord_list.append(start_dms)    
-                
-                if shape == "Polygon":
-                    # if it's a polygon, colour it in!
-                    if (obj == "aerodrome"):
-                        colour = "Green"
-                    elif (obj == "apron"):
-                        colour = "Grey"
-                    elif (obj == "control_tower"):
-                        colour = "Maroon"
-                    else:
-                        colour = "Black"
-
-                    n = 0
-                    list_len = len(coord_list)
-                    while n < (list_len - 1):
-                        try:
-                            with open("Airfields/UK_AIRFIELD_REGIONS.txt", "a") as file:
-                                if n == 0: # name this region
-                                    file.write(f"A-{icao[0]}-{b}-{obj}\n{colour}")
-                                    b += 1
-                                file.write(f" {coord_list[n]}\n")
-                            n += 1
-                        except PermissionError:
-                            print("Wait...")
-                            sleep(2)
-                elif shape == "LineString":
-                    # if it's a line, colour it in!
-                    if obj == "runway":
-                        colour = "0"
-                        # if it's a runway (or taxiway) do a bit of code to pop the name in    
-                        try:               
-                            if props["name"]:
-                                label = props["name"]
-                            elif props["ref"]:
-                                label = props["ref"]
-                        except KeyError:
-                            label = None                       
-                    elif obj == "taxiway":
-                        colour = "Blue"
-                        try:
-                            if props["name"]:
-                                label = props["name"]
-                            elif props["ref"]:
-                                label = props["ref"]
-                        except KeyError:
-                            label = None
-                    elif obj == "parking_position":
-                        colour = "Red" # !!!!!!!
-                        if props["name"]:
-                            label = props["name"]
-                        elif props["ref"]:
-                            label = props["ref"]  
+    features = group_features(airfield_geojson)
+    ordered = [(obj, item, props) for obj in reversed(objects) for item, props in features.get(obj, [])]
+    point_lists = [feature_points(item) for obj, item, props in ordered]
+    # labels are placed by the surveyed number of points, so simplifying a line never loses its label
+    counts = [len(points) for points in point_lists]
+    if simplify:
+        point_lists = [
+            simplify_points(points, item["type"], SIMPLIFY_TOLERANCE.get(obj))
+            for (obj, item, props), points in zip(ordered, point_lists)
+            ]
+    # every point of the airfield is formatted at once
+    coord_lists = format_features(point_lists)
+    for (obj, item, props), coord_list, count in zip(ordered, coord_lists, counts):
+        shape = item["type"]
+
+        if shape == "Polygon":
+            # if it's a polygon, colour it in!
+            if (obj == "aerodrome"):
+                colour = "Green"
+            elif (obj == "apron"):
+                colour = "Grey"
+            elif (obj == "control_tower"):
+                colour = "Maroon"
+            else:
+                colour = "Black"
+
+            # every point but the last, which closes the polygon
+            if len(coord_list) > 1:
+                # name this region
+                regions.append(f"A-{icao[0]}-{b}-{obj}\n{colour}")
+                b += 1
+                regions.extend(f" {coord}\n" for coord in coord_list[:-1])
+        elif shape == "LineString":
+            # if it's a line, colour it in!
+            if obj == "runway":
+                colour = "0"
+                # if it's a runway (or taxiway) do a bit of code to pop the name in
+                try:
+                    if props["name"]:
+                        label = props["name"]
+                    elif props["ref"]:
+                        label = props["ref"]
+                except KeyError:
+                    label = None
+            elif obj == "taxiway":
+                colour = "Blue"
+                try:
+                    if props["name"]:
+                        label = props["name"]
+                    elif props["ref"]:
+                        label = props["ref"]
+                except KeyError:
+                    label = None
+            elif obj == "parking_position":
+                colour = "Red" # !!!!!!!
+                if props["name"]:
+                    label = props["name"]
+                elif props["ref"]:
+                    label = props["ref"]
+            else:
+                colour = "Purple"
+
+            # a line for each segment
+            airfields.extend(
+                f"{icao[0]}\t{props['aeroway']}\t{label}\t{start}\t{end}\t{colour}\n"
+                for start, end in zip(coord_list[:-1], coord_list[1:])
+                )
+
+            # print the runway / taxiway name somewhere along the middle of it (in theory)
+            half_n = max(round(count / 2), 1)
+            if (half_n < count - 1) and label:
+                labels.append(f"{coord_list[0].replace(' ', ':')}:{icao[0]} {props['aeroway']}:{label}\n")
+        elif shape == "Point":
+            for c in coord_list:
+                # is it a name or ref?
+                try:
+                    if props['name']:
+                        label = props['name']
+                    elif props['ref']:
+                        label = props['ref']
+                    elif props['parking_position']:
+                        label = "HELI"
                     else:
-                        colour = "Purple"
-
-                    n = 0
-                    list_len = len(coord_list)
-                    half_n = round(list_len / 2)
-                    if half_n < 1:
-                        half_n = 1
-                    
-                    while n < (list_len - 1):
-                        with open("Airfields/UK_AIRFIELDS.txt", "a") as file:
-                            if label:
-                                label_p = label
-                            else:
-                                label_p = False
-                            file.write(f"{icao[0]}\t{props['aeroway']}\t{label}\t{coord_list[n]}\t{coord_list[n+1]}\t{colour}\n")
-
-                        # print the runway / taxiway name somewhere along the middle of it (in theory)
-                        if (n == half_n) and label:
-                            with open("Airfields/UK_AIRFIELD_LABELS.txt", "a") as file:
-                                file.write(f"{coord_list[0].replace(' ', ':')}:{icao[0]} {props['aeroway']}:{label}\n")
-
-                        n += 1
-                elif shape == "Point":
-                    n = 0
-                    for c in coord_list:
-                        # is it a name or ref?
-                        try:
-                            if props['name']:
-                                label = props['name']
-                            elif props['ref']:
-                                label = props['ref']
-                            elif props['parking_position']:
-                                label = "HELI"
-                            else:
-                                label = None
-                            with open("Airfields/UK_AIRFIELD_LABELS.txt", "a") as file:
-                                if label:
-                                    file.write(f"{c.replace(' ', ':')}:{icao[0]} {props['aeroway']}:{label}\n")
-                        except KeyError as err:
-                            print(err, props)
-                        n += 1
\ No newline at end of file
+                        label = None
+                    if label:
+                        labels.append(f"{c.replace(' ', ':')}:{icao[0]} {props['aeroway']}:{label}\n")
+                except KeyError as err:
+                    print(err, props)
+    return ("".join(regions), "".join(airfields), "".join(labels)), (sum(counts), sum(len(points) for points in point_lists))
+
+class AirfieldCache(FragmentCache):
+    """Keeps the converted text of each airfield on disk along with a fingerprint of its GeoJSON file"""
+
+    def __init__(self, directory, simplify=True, rebuild=False):
+        # the converter's own code and settings are part of every fingerprint, changing them converts everything again
+        version = code_version(__file__, coordinates.__file__, fragments.__file__)
+        version.update(repr((simplify, SIMPLIFY_TOLERANCE)).encode())
+        super().__init__(directory, version, ".pickle", rebuild)
+
+    def changed(self, json_files):
+        """Returns the GeoJSON files which have to be converted again, and forgets any which have been removed"""
+        self.forget(json_files)
+        self.keys = {filename: self.fingerprint([f"{work_dir}\\AirfieldGeoJson\\{filename}"]) for filename in json_files}
+        return [filename for filename in json_files if not self.current(filename, self.keys[filename])]
+
+    def store(self, filename, result):
+        self.write(filename, self.keys[filename], lambda write_file: pickle.dump(result, write_file), "wb")
+
+    def load(self, filename):
+        with open(self.fragment_file(filename), "rb") as read_file:
+            return pickle.load(read_file)
+
+def convert_all(json_files, workers=None, simplify=True):
+    """Convert every GeoJSON file, yields the file name and result of each in the order they were given"""
+    # more processes than cores only adds start up time
+    workers = min(workers or os.cpu_count() or 1, os.cpu_count() or 1)
+    if workers < 2:
+        for j in json_files:
+            yield j, convert_airfield(j, simplify)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(json_files, executor.map(convert_airfield, json_files, repeat(simplify)))
+
+if __name__ == "__main__":
+    cmdParse = argparse.ArgumentParser(description="Convert the OSM GeoJSON files in AirfieldGeoJson to the Airfields files")
+    cmdParse.add_argument('-w', '--workers', help='number of airfields to convert at the same time', type=int)
+    cmdParse.add_argument('--no-simplify', help='write every surveyed vertex rather than simplifying the ground layouts', action='store_true')
+    cmdParse.add_argument('--rebuild', help='convert every airfield again, even if its GeoJSON has not changed', action='store_true')
+    args = cmdParse.parse_args()
+
+    # sorted so the airfields are always written in the same order
+    json_files = sorted(os.listdir(f"{work_dir}\\AirfieldGeoJson\\"))
+
+    # only the airfields whose GeoJSON has changed are converted, the rest come from the last run
+    cache = AirfieldCache("Airfields/Fragments", not args.no_simplify, args.rebuild)
+    changed = cache.changed(json_files)
+    for j, (texts, (before, after)) in convert_all(changed, args.workers, not args.no_simplify):
+        print(f"{j}: {before} vertices, {after} written")
+        cache.store(j, (texts, (before, after)))
+    cache.save()
+    print(f"Converted {len(changed)} of {len(json_files)} airfields")
+
+    # each combined file is written through one buffered writer and only replaces the old one once it is complete
+    outputs = [open(f"{filename}.tmp", "w", buffering=WRITE_BUFFER) for filename in OUTPUT_FILES]
+    try:
+        total_before = 0
+        total_after = 0
+        for j in json_files:
+            texts, (before, after) = cache.load(j)
+            total_before += before
+            total_after += after
+            for output, text in zip(outputs, texts):
+                output.write(text)
+        print(f"{total_before} vertices, {total_after} written")
+    finally:
+        for output in outputs:
+            output.close()
+    for filename in OUTPUT_FILES:
+        os.replace(f"{filename}.tmp", filename)
@@ -0,0 +1,281 @@
+"""Runs the AirfieldOverPass queries and saves the results to AirfieldGeoJson for osm_data_parse.py
+
+Each osm-script in AirfieldOverPass is sent to an Overpass API interpreter, or answered from a directory of saved
+responses, and the OSM data which comes back is turned into the same GeoJSON layout Overpass Turbo exports. Responses
+are cached per bounding box in Cache/Overpass, so only new or changed queries are sent again unless --refresh is
+given. Queries run at the same time up to --workers, with at least --interval seconds between each one starting.
+
+Run from the repository root: python Scripts/overpass_fetch.py [ICAO ...]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from colorama import Fore, Style
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from shapely.geometry import Point, Polygon
+from urllib3.util.retry import Retry
+
+DEFAULT_ENDPOINT = "https://overpass-api.de/api/interpreter"
+
+# tags which don't make a node or way worth a feature on their own
+UNINTERESTING_TAGS = ("source", "source_ref", "source:ref", "history", "attribution", "created_by", "converted_by", "fixme", "FIXME", "note")
+
+# closed ways with these aeroway values are lines unless they are tagged area=yes
+LINEAR_AEROWAYS = ("taxiway",)
+
+class RateLimit:
+    """Spaces out the start of each request by at least interval seconds, across every thread"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        time.sleep(start - now)
+
+class OverpassEndpoint:
+    """Sends queries to an Overpass API interpreter"""
+
+    def __init__(self, url, workers=2, timeout=180):
+        self.url = url
+        self.timeout = timeout
+        # busy servers answer 429 or 504, those are tried again after a pause
+        retry = Retry(total=4, backoff_factor=5, status_forcelist=[429, 502, 503, 504], allowed_methods=["POST"])
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry))
+
+    def run(self, name, query):
+        response = self.session.post(self.url, data={"data": query}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+class FileEndpoint:
+    """Stand-in for an Overpass server which answers the query for each airfield from <directory>/<ICAO>.json"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def run(self, name, query):
+        with open(os.path.join(self.directory, f"{name}.json")) as read_file:
+            return json.load(read_file)
+
+def endpoint(spec, workers=2):
+    """Returns the endpoint for a URL, or a directory of saved responses"""
+    if spec.startswith("http://") or spec.startswith("https://"):
+        return OverpassEndpoint(spec, workers)
+    return FileEndpoint(spec)
+
+def query_bbox(query):
+    """Returns the (s, w, n, e) of the first bbox-query in an osm-script"""
+    bbox = etree.fromstring(query.encode()).find(".//bbox-query")
+    if bbox is None:
+        raise ValueError("the query has no bbox-query")
+    return tuple(bbox.get(side) for side in ("s", "w", "n", "e"))
+
+def cache_file(cache_dir, query):
+    """Cached response for a query, named by its bounding box and a hash of the whole query"""
+    digest = hashlib.sha1(query.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{'_'.join(query_bbox(query))}-{digest}.json.gz")
+
+def interesting(tags):
+    return any(key not in UNINTERESTING_TAGS for key in tags)
+
+def is_area(tags):
+    """Returns True if a closed way with these tags is a polygon rather than a line"""
+    if tags.get("area") == "no":
+        return False
+    if tags.get("aeroway") in LINEAR_AEROWAYS:
+        return tags.get("area") == "yes"
+    return True
+
+def join_rings(lines):
+    """Join way coordinates end to end into closed rings, anything which can't be closed is dropped"""
+    lines = [list(line) for line in lines if len(line) > 1]
+    rings = []
+    while lines:
+        ring = lines.pop(0)
+        while ring[0] != ring[-1]:
+            for i, line in enumerate(lines):
+                if line[0] == ring[-1]:
+                    ring.extend(line[1:])
+                elif line[-1] == ring[-1]:
+                    ring.extend(line[-2::-1])
+                elif line[-1] == ring[0]:
+                    ring[:0] = line[:-1]
+                elif line[0] == ring[0]:
+                    ring[:0] = line[:0:-1]
+                else:
+                    continue
+                del lines[i]
+                break
+            else:
+                break
+        if (ring[0] == ring[-1]) and (len(ring) >= 4):
+            rings.append(ring)
+    return rings
+
+def merge_element(elements, element):
+    """Add an element by id. The queries print every element with its tags and then again in skeleton mode after
+    recursing down, so a repeated element only fills in what the first copy didn't have"""
+    existing = elements.get(element["id"])
+    if existing is None:
+        elements[element["id"]] = element
+        return
+    for key, value in element.items():
+        if key == "tags":
+            existing["tags"] = {**value, **existing.get("tags", {})}
+        elif key not in existing:
+            existing[key] = value
+
+def feature(element, geometry):
+    osm_id = f"{element['type']}/{element['id']}"
+    return {"type": "Feature", "properties": {"@id": osm_id, **element.get("tags", {})}, "geometry": geometry, "id": osm_id}
+
+def to_geojson(response):
+    """Turn an Overpass JSON response into a GeoJSON FeatureCollection, polygons first then lines then points"""
+    elements = {"node": {}, "way": {}, "relation": {}}
+    for element in response.get("elements", []):
+        if element["type"] in elements:
+            merge_element(elements[element["type"]], element)
+    nodes = elements["node"]
+    ways = elements["way"]
+
+    def way_coords(way):
+        return [[nodes[ref]["lon"], nodes[ref]["lat"]] for ref in way.get("nodes", []) if ref in nodes]
+
+    polygons = []
+    lines = []
+    points = []
+    for relation in elements["relation"].values():
+        if relation.get("tags", {}).get("type") not in ("multipolygon", "boundary"):
+            continue
+        members = [member for member in relation.get("members", []) if (member["type"] == "way") and (member["ref"] in ways)]
+        outers = join_rings(way_coords(ways[member["ref"]]) for member in members if member.get("role") in ("outer", ""))
+        inners = join_rings(way_coords(ways[member["ref"]]) for member in members if member.get("role") == "inner")
+        if not outers:
+            continue
+
+        # each inner ring goes in the outer ring it is inside
+        shapes = [[outer] for outer in outers]
+        outer_polygons = [Polygon(outer) for outer in outers]
+        for inner in inners:
+            inside = [i for i, outer in enumerate(outer_polygons) if outer.contains(Point(inner[0]))]
+            shapes[inside[0] if inside else 0].append(inner)
+        if len(shapes) == 1:
+            polygons.append(feature(relation, {"type": "Polygon", "coordinates": shapes[0]}))
+        else:
+            polygons.append(feature(relation, {"type": "MultiPolygon", "coordinates": shapes}))
+
+    for way in ways.values():
+        tags = way.get("tags", {})
+        coords = way_coords(way)
+        if (not interesting(tags)) or (len(coords) < 2):
+            continue
+        if (coords[0] == coords[-1]) and (len(coords) >= 4) and is_area(tags):
+            polygons.append(feature(way, {"type": "Polygon", "coordinates": [coords]}))
+        else:
+            lines.append(feature(way, {"type": "LineString", "coordinates": coords}))
+
+    for node in nodes.values():
+        if interesting(node.get("tags", {})):
+            points.append(feature(node, {"type": "Point", "coordinates": [node["lon"], node["lat"]]}))
+
+    osm3s = response.get("osm3s", {})
+    return {
+        "type": "FeatureCollection",
+        "generator": response.get("generator", "overpass"),
+        "copyright": osm3s.get("copyright", "The data included in this document is from www.openstreetmap.org. The data is made available under ODbL."),
+        "timestamp": osm3s.get("timestamp_osm_base", ""),
+        "features": polygons + lines + points
+        }
+
+class OverpassFetch:
+    """Runs every airfield's query, using the cached response for its bounding box where there is one"""
+
+    def __init__(self, endpoint, cache_dir="Cache/Overpass", refresh=False, workers=2, interval=1.0):
+        self.endpoint = endpoint
+        self.cache_dir = cache_dir
+        self.refresh = refresh
+        self.workers = workers
+        self.rate_limit = RateLimit(interval)
+
+    def response(self, name, query):
+        """Returns the response to a query and whether it came from the cache"""
+        cached = cache_file(self.cache_dir, query) if self.cache_dir else None
+        if cached and (not self.refresh) and os.path.exists(cached):
+            with gzip.open(cached, "rt") as read_file:
+                return json.load(read_file), True
+
+        self.rate_limit.wait()
+        response = self.endpoint.run(name, query)
+        if cached:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write to a temp file first so a half written response is never served from the cache
+            with gzip.open(f"{cached}.tmp", "wt") as write_file:
+                json.dump(response, write_file)
+            os.replace(f"{cached}.tmp", cached)
+        return response, False
+
+    def fetch(self, name, query_file, output_dir):
+        """Run one airfield's query and write its GeoJSON file"""
+        with open(query_file) as read_file:
+            query = read_file.read()
+        response, from_cache = self.response(name, query)
+        geojson = to_geojson(response)
+
+        output_file = os.path.join(output_dir, f"{name}.geojson")
+        with open(f"{output_file}.tmp", "w") as write_file:
+            json.dump(geojson, write_file, indent=2)
+        os.replace(f"{output_file}.tmp", output_file)
+        return name, len(geojson["features"]), from_cache
+
+    def run(self, queries, output_dir):
+        """Fetch every (name, query file), yields the name, number of features, whether it was cached and the error
+        if it failed. One airfield failing doesn't stop the rest"""
+        os.makedirs(output_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [(name, executor.submit(self.fetch, name, query_file, output_dir)) for name, query_file in queries]
+            for name, future in futures:
+                try:
+                    yield future.result() + (None,)
+                except (OSError, ValueError, etree.XMLSyntaxError, requests.RequestException) as error:
+                    yield name, 0, False, error
+
+if __name__ == "__main__":
+    cmdParse = argparse.ArgumentParser(description="Run the AirfieldOverPass queries and save the results as GeoJSON")
+    cmdParse.add_argument('airfields', help='ICAO designators to fetch, every query in --scripts if none are given', nargs='*')
+    cmdParse.add_argument('--endpoint', help='Overpass API interpreter URL, or a directory holding a saved <ICAO>.json response for each airfield', default=DEFAULT_ENDPOINT)
+    cmdParse.add_argument('--scripts', help='directory of osm-script queries', default="AirfieldOverPass")
+    cmdParse.add_argument('--output', help='directory the GeoJSON files are saved to', default="AirfieldGeoJson")
+    cmdParse.add_argument('--cache-dir', help='directory the responses are cached in', default=os.path.join("Cache", "Overpass"))
+    cmdParse.add_argument('--refresh', help='always send the queries rather than using cached responses', action='store_true')
+    cmdParse.add_argument('-w', '--workers', help='number of queries to run at the same time', type=int, default=2)
+    cmdParse.add_argument('--interval', help='minimum number of seconds between the start of each query', type=float, default=1.0)
+    args = cmdParse.parse_args()
+
+    airfields = [icao.upper() for icao in args.airfields] or sorted(os.path.splitext(file)[0] for file in os.listdir(args.scripts) if file.endswith(".xml"))
+    queries = [(icao, os.path.join(args.scripts, f"{icao}.xml")) for icao in airfields]
+    fetch = OverpassFetch(endpoint(args.endpoint, args.workers), args.cache_dir, args.refresh, args.workers, args.interval)
+    failed = []
+    for name, features, from_cache, error in fetch.run(queries, args.output):
+        if error:
+            print(Fore.RED + f"{name}: {error}" + Style.RESET_ALL)
+            failed.append(name)
+        else:
+            print(f"{name}: {features} features{' (cached)' if from_cache else ''}")
+    if failed:
+        raise SystemExit(f"{len(failed)} of {len(queries)} airfields failed")
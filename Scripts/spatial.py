@@ -0,0 +1,201 @@
+"""Spatial index over the airspace volumes in the Dataframes
+
+Each airspace boundary is turned into a Shapely polygon with its lower and upper limits in feet and an STRtree is
+built over the polygons, so the volumes around a point or inside an area can be found without checking every one.
+The polygons are saved to Dataframes/Airspace.index and only rebuilt when the tables they came from change.
+
+    python spatial.py point 51.4706 -0.4619 --fl 120
+    python spatial.py bbox 51.0 -1.0 52.0 0.5
+"""
+import argparse
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style
+from shapely import wkb
+from shapely.geometry import Point, Polygon, box
+from shapely.strtree import STRtree
+
+import coordinates
+import storage
+
+# tables holding airspace volumes
+AIRSPACE_TABLES = ["Enr021-FIR", "Enr021-UIR", "Enr021-CTA", "Enr021-TMA", "Enr022-ATZ", "Ad0217-ATS", "Enr051", "AccUac"]
+
+INDEX_FILE = "Airspace.index"
+
+# changing how the index is built changes this, so older index files are rebuilt
+INDEX_VERSION = 2
+
+FEET_PER_METRE = 1 / 0.3048
+
+def limit_feet(value, unit, default):
+    """Convert a vertical limit from the tables to feet, using the unit published with it - FL, FT or M. SFC is the
+    surface and 000 (or nothing) means no limit was published so default is used. Tables scraped before the units
+    were kept have none, for those three digits or fewer is taken as a flight level and four or more as feet"""
+    value = str(value).strip().upper()
+    unit = str(unit).strip().upper()
+    if value in ("SFC", "GND"):
+        return 0.0
+    if (not value.isdigit()) or (int(value) == 0):
+        return default
+    if unit == "FL":
+        return int(value) * 100.0
+    if unit == "FT":
+        return float(value)
+    if unit == "M":
+        return float(value) * FEET_PER_METRE
+    if len(value) <= 3:
+        return int(value) * 100.0
+    return float(value)
+
+def boundary_vertices(df):
+    """Returns an (n, 2) array of lat/lon for each boundary of a table, using the vertices from the Arrow store where
+    they have been loaded"""
+    if "vertices" in df.columns:
+        return list(df["vertices"])
+    boundaries = [list(boundary) for boundary in df["boundary"]]
+    points = coordinates.sct_to_dd([point for boundary in boundaries for point in boundary])
+    ends = np.cumsum([len(boundary) for boundary in boundaries])
+    return np.split(points, ends[:-1]) if len(ends) else []
+
+def sources_fingerprint(directory):
+    """Returns a hash of the CSV files the index is built from"""
+    digest = hashlib.sha1(str(INDEX_VERSION).encode())
+    for table in AIRSPACE_TABLES:
+        with open(storage.csv_file(directory, table), "rb") as read_file:
+            digest.update(read_file.read())
+    return digest.hexdigest()
+
+class GeometryTree:
+    """An STRtree which always answers a query with the positions of the geometries it was built from"""
+
+    def __init__(self, geometries):
+        self.tree = STRtree(geometries)
+        # Shapely 1.8 returns the matching geometries from a query rather than their positions
+        self.position = {id(geometry): i for i, geometry in enumerate(geometries)}
+
+    def query(self, geometry):
+        """Positions of the geometries whose bounding boxes intersect the geometry, in order"""
+        found = self.tree.query(geometry)
+        if len(found) and not isinstance(found[0], (int, np.integer)):
+            found = [self.position[id(match)] for match in found]
+        return np.sort(np.asarray(found, dtype=int))
+
+class AirspaceIndex:
+    """Airspace polygons with their vertical limits and an STRtree over them"""
+
+    def __init__(self, volumes, polygons):
+        # one row per polygon - table, name, lower_ft, upper_ft
+        self.volumes = volumes.reset_index(drop=True)
+        self.polygons = polygons
+        self.tree = GeometryTree(polygons)
+
+    @classmethod
+    def build(cls, directory, arrow=True):
+        """Build the index from the airspace tables"""
+        volumes = []
+        polygons = []
+        for table in AIRSPACE_TABLES:
+            df = storage.load_table(directory, table, arrow)
+            for (index, row), points in zip(df.iterrows(), boundary_vertices(df)):
+                if len(points) < 3:
+                    continue
+                polygon = Polygon(np.asarray(points)[:, ::-1])
+                if not polygon.is_valid:
+                    # boundaries which cross themselves are split into valid parts
+                    polygon = polygon.buffer(0)
+                if polygon.is_empty:
+                    continue
+                lower_ft = limit_feet(row.get('lower_fl', 'SFC'), row.get('lower_unit', ''), 0.0)
+                upper_ft = limit_feet(row.get('upper_fl', '000'), row.get('upper_unit', ''), np.inf)
+                if lower_ft > upper_ft:
+                    # one of the limits has been read wrongly, the volume is still found by area but not by level
+                    print(Fore.YELLOW + f"{table} {row['name']}: lower limit {lower_ft:g} ft is above the upper limit {upper_ft:g} ft, indexed without its limits" + Style.RESET_ALL)
+                    lower_ft = np.nan
+                    upper_ft = np.nan
+                volumes.append({
+                    'table': table,
+                    'name': row['name'],
+                    'lower_ft': lower_ft,
+                    'upper_ft': upper_ft
+                    })
+                polygons.append(polygon)
+        return cls(pd.DataFrame(volumes, columns=['table', 'name', 'lower_ft', 'upper_ft']), polygons)
+
+    def save(self, filename, fingerprint):
+        with open(f"{filename}.tmp", "wb") as write_file:
+            pickle.dump({
+                'fingerprint': fingerprint,
+                'volumes': self.volumes,
+                'polygons': [polygon.wkb for polygon in self.polygons]
+                }, write_file)
+        os.replace(f"{filename}.tmp", filename)
+
+    @classmethod
+    def load(cls, directory, arrow=True):
+        """Load the saved index, building and saving it first if the airspace tables have changed since"""
+        filename = os.path.join(directory, INDEX_FILE)
+        fingerprint = sources_fingerprint(directory)
+        if os.path.exists(filename):
+            with open(filename, "rb") as read_file:
+                saved = pickle.load(read_file)
+            if saved['fingerprint'] == fingerprint:
+                return cls(saved['volumes'], [wkb.loads(polygon) for polygon in saved['polygons']])
+
+        index = cls.build(directory, arrow)
+        index.save(filename, fingerprint)
+        return index
+
+    def candidates(self, geometry):
+        """Positions of the polygons whose bounding boxes intersect the geometry"""
+        return self.tree.query(geometry)
+
+    def at(self, lat, lon, fl=None):
+        """Returns the volumes containing a point, and if a flight level is given only those with it inside their
+        vertical limits. Volumes indexed without their limits are only returned when no flight level is given"""
+        point = Point(lon, lat)
+        found = [i for i in self.candidates(point) if self.polygons[i].covers(point)]
+        volumes = self.volumes.iloc[found]
+        if fl is not None:
+            feet = fl * 100
+            volumes = volumes.loc[(volumes['lower_ft'] <= feet) & (volumes['upper_ft'] >= feet)]
+        return volumes
+
+    def intersecting(self, area):
+        """Returns the volumes which overlap an area, given as a Shapely geometry in lon/lat"""
+        found = [i for i in self.candidates(area) if self.polygons[i].intersects(area)]
+        return self.volumes.iloc[found]
+
+    def in_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Returns the volumes which overlap a box"""
+        return self.intersecting(box(min_lon, min_lat, max_lon, max_lat))
+
+if __name__ == "__main__":
+    cmdParse = argparse.ArgumentParser(description="Find the airspace volumes at a point or inside an area")
+    cmdParse.add_argument('--dataframes', help='directory holding the dataframes', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Dataframes"))
+    commands = cmdParse.add_subparsers(dest='command', required=True)
+    cmdPoint = commands.add_parser('point', help='volumes containing a point')
+    cmdPoint.add_argument('lat', type=float)
+    cmdPoint.add_argument('lon', type=float)
+    cmdPoint.add_argument('--fl', help='only volumes which include this flight level', type=float)
+    cmdBox = commands.add_parser('bbox', help='volumes overlapping an area')
+    for name in ('min_lat', 'min_lon', 'max_lat', 'max_lon'):
+        cmdBox.add_argument(name, type=float)
+    commands.add_parser('build', help='rebuild the saved index')
+    args = cmdParse.parse_args()
+
+    if args.command == 'build':
+        index = AirspaceIndex.build(args.dataframes)
+        index.save(os.path.join(args.dataframes, INDEX_FILE), sources_fingerprint(args.dataframes))
+        print(f"{len(index.volumes)} volumes")
+    else:
+        index = AirspaceIndex.load(args.dataframes)
+        if args.command == 'point':
+            found = index.at(args.lat, args.lon, args.fl)
+        else:
+            found = index.in_bbox(args.min_lat, args.min_lon, args.max_lat, args.max_lon)
+        print(found.to_string(index=False) if len(found) else "No airspace found")
@@ -0,0 +1,217 @@
+"""Loading and saving the scraped dataframes
+
+The CSV files in Dataframes are the master copy and are always written. If pyarrow is installed each table can
+also be saved as an uncompressed Arrow file next to its CSV. Those are memory-mapped when loaded and hold the
+boundaries and routes as list columns, so a build doesn't have to parse any text. Boundaries also get a vertices
+column holding every point as [lat, lon] decimal degrees.
+
+Running this file on its own converts the CSV files already in Dataframes to Arrow files.
+"""
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import coordinates
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+
+# tables in the order Builder.scrape indexes them
+TABLES = [
+    "Ad01",         #0
+    "Ad02-Runways", #1
+    "Ad02-Services",#2
+    "Enr016",       #3
+    "Enr021-FIR",   #4
+    "Enr021-UIR",   #5
+    "Enr021-CTA",   #6
+    "Enr021-TMA",   #7
+    "Enr022-ATZ",   #8
+    "Enr031",       #9
+    "Enr033",       #10
+    "Enr035",       #11
+    "Enr041",       #12
+    "Enr044",       #13
+    "Enr051",       #14
+    "Ad0217-ATS",   #15
+    "AccUac"        #16
+    ]
+
+# tables compared by the changelog, grouped by what they hold, with the columns which name each row
+CHANGELOG = {
+    "aerodromes": [("Ad01", ["icao_designator"]), ("Ad02-Services", ["icao_designator", "callsign_type"])],
+    "runways": [("Ad02-Runways", ["icao_designator", "runway"])],
+    "airspaces": [(table, ["name"]) for table in ("Enr021-FIR", "Enr021-UIR", "Enr021-CTA", "Enr021-TMA", "Enr022-ATZ", "Ad0217-ATS", "Enr051", "AccUac")],
+    "navaids": [("Enr041", ["name", "type"]), ("Enr044", ["name"])],
+    "airways": [(table, ["name"]) for table in ("Enr031", "Enr033", "Enr035")]
+    }
+
+# columns which are stored in the CSV files as '/' separated lists
+LIST_COLUMNS = ("boundary", "route")
+
+def available():
+    """Returns True if the Arrow files can be read and written"""
+    return pa is not None
+
+def csv_file(directory, table):
+    return os.path.join(directory, f"{table}.csv")
+
+def arrow_file(directory, table):
+    return os.path.join(directory, f"{table}.arrow")
+
+def split_lists(df):
+    """Split the '/' separated columns of a table read from CSV into lists"""
+    for column in LIST_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].str.split("/")
+    return df
+
+def read_csv(directory, table):
+    """Read a table from its CSV file, with the boundaries and routes as lists"""
+    return split_lists(pd.read_csv(csv_file(directory, table), index_col=0))
+
+def vertices_column(boundaries):
+    """Return an Arrow column of [lat, lon] pairs for each boundary, every point is parsed in one go"""
+    lengths = [len(boundary) for boundary in boundaries]
+    points = coordinates.sct_to_dd([point for boundary in boundaries for point in boundary])
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int32)
+    pairs = pa.FixedSizeListArray.from_arrays(pa.array(points.ravel()), 2)
+    return pa.ListArray.from_arrays(pa.array(offsets), pairs)
+
+def write_arrow(df, path):
+    """Save a table read by read_csv as an uncompressed Arrow file, uncompressed so it can be memory-mapped"""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    if "boundary" in df.columns:
+        try:
+            table = table.append_column("vertices", vertices_column(df["boundary"].tolist()))
+        except ValueError as error:
+            # the boundary text is still saved, only the parsed points are left out
+            print(f"{os.path.basename(path)}: no vertices saved, {error}")
+
+    tmp = f"{path}.tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+
+def read_arrow(path):
+    """Load a table from its Arrow file. The vertices of each boundary are returned as (n, 2) arrays which are
+    views onto the memory-mapped file"""
+    table = feather.read_table(path, memory_map=True)
+    vertices = None
+    if "vertices" in table.column_names:
+        column = table.column("vertices").combine_chunks()
+        table = table.drop(["vertices"])
+        points = column.values.values.to_numpy().reshape(-1, 2)
+        offsets = column.offsets.to_numpy()
+        vertices = [points[offsets[i]:offsets[i + 1]] for i in range(len(column))]
+
+    df = table.to_pandas()
+    if vertices is not None:
+        df["vertices"] = vertices
+    return df
+
+def arrow_current(directory, table):
+    """Returns True if the Arrow file of a table exists and is at least as new as its CSV file"""
+    arrow = arrow_file(directory, table)
+    if not os.path.exists(arrow):
+        return False
+    return os.path.getmtime(arrow) >= os.path.getmtime(csv_file(directory, table))
+
+def convert(directory, table):
+    """Write the Arrow file of a table from its CSV file"""
+    write_arrow(read_csv(directory, table), arrow_file(directory, table))
+
+def save_tables(frames, directory, arrow=False):
+    """Save the scraped tables, in the order of TABLES, as CSV and optionally as Arrow files"""
+    for table, df in zip(TABLES, frames):
+        df.to_csv(csv_file(directory, table))
+        if arrow and available():
+            # built from the CSV so a build gives the same output whichever file it loads
+            convert(directory, table)
+
+def load_table(directory, table, arrow=True):
+    """Load one table, from its Arrow file if that is up to date"""
+    if arrow and available() and arrow_current(directory, table):
+        return read_arrow(arrow_file(directory, table))
+    return read_csv(directory, table)
+
+def load_tables(directory, arrow=True):
+    """Load every table in the order of TABLES"""
+    return [load_table(directory, table, arrow) for table in TABLES]
+
+class TableLoader:
+    """Indexed like the list from load_tables, but each table is only loaded the first time it is used"""
+
+    def __init__(self, directory, arrow=True):
+        self.directory = directory
+        self.arrow = arrow
+        self.frames = {}
+
+    def __len__(self):
+        return len(TABLES)
+
+    def __getitem__(self, index):
+        if index not in self.frames:
+            self.frames[index] = load_table(self.directory, TABLES[index], self.arrow)
+        return self.frames[index]
+
+def text_table(df):
+    """Returns a table exactly as it reads back from its CSV file, with every value as text"""
+    return pd.read_csv(io.StringIO(df.to_csv()), index_col=0, dtype=str, keep_default_na=False)
+
+def read_text(directory, table):
+    """Read a table from its CSV file with every value as text, or None if there isn't one"""
+    if not os.path.exists(csv_file(directory, table)):
+        return None
+    return pd.read_csv(csv_file(directory, table), index_col=0, dtype=str, keep_default_na=False)
+
+def rows_by_key(df, keys):
+    """Returns the rows of a text table grouped by their key columns"""
+    rows = {}
+    key_text = df[keys].agg(" ".join, axis=1) if len(df.index) else []
+    row_text = df.agg("\t".join, axis=1) if len(df.index) else []
+    for key, row in zip(key_text, row_text):
+        rows.setdefault(key, []).append(row)
+    return {key: sorted(values) for key, values in rows.items()}
+
+def compare_tables(previous, current, keys):
+    """Returns the keys of the rows which have been added, removed or changed between two text tables"""
+    previous = rows_by_key(previous, keys)
+    current = rows_by_key(current, keys)
+    return {
+        "added": sorted(current.keys() - previous.keys()),
+        "removed": sorted(previous.keys() - current.keys()),
+        "changed": sorted(key for key in current.keys() & previous.keys() if current[key] != previous[key])
+        }
+
+def changelog(previous, current):
+    """Compare two sets of text tables, given as dicts keyed on table name. A table with no previous copy is
+    left out as there is nothing to compare it with"""
+    changes = {}
+    for group, tables in CHANGELOG.items():
+        changes[group] = {"added": [], "removed": [], "changed": []}
+        for table, keys in tables:
+            if (previous.get(table) is None) or (current.get(table) is None):
+                continue
+            for change, names in compare_tables(previous[table], current[table], keys).items():
+                changes[group][change].extend(f"{table}: {name}" for name in names)
+    return changes
+
+def write_json(path, data):
+    with open(f"{path}.tmp", "w") as write_file:
+        json.dump(data, write_file, indent=1)
+    os.replace(f"{path}.tmp", path)
+
+if __name__ == "__main__":
+    if not available():
+        raise SystemExit("pyarrow is needed to write Arrow files")
+
+    dataframes = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Dataframes")
+    for table in TABLES:
+        convert(dataframes, table)
+        print(f"{table}.arrow")
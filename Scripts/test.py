@@ -15,6 +15,7 @@ from datetime import date
 from bs4 import BeautifulSoup
 from colorama import Fore, Style
 from alive_progress import alive_bar
+from coordinates import dd2dms, dms2dd, sct_location_builder
 
 work_dir = os.getcwd()
 
@@ -55,95 +56,6 @@ def generate_semicircle(center_x, center_y, start_x, start_y, end_x, end_y, dire
 
     return arc_out
 
-def dd2dms(latitude, longitude, dd_type=0):
-
-    # math.modf() splits whole number and decimal into tuple
-    # eg 53.3478 becomes (0.3478, 53)
-    split_degx = math.modf(longitude)
-    
-    # the whole number [index 1] is the degrees
-    degrees_x = int(split_degx[1])
-
-    # multiply the decimal part by 60: 0.3478 * 60 = 20.868
-    # split the whole number part of the total as the minutes: 20
-    # abs() absoulte value - no negative
-    minutes_x = abs(int(math.modf(split_degx[0] * 60)[1]))
-
-    # multiply the decimal part of the split above by 60 to get the seconds
-    # 0.868 x 60 = 52.08, round excess decimal places to 2 places
-    # abs() absoulte value - no negative
-    seconds_x = abs(round(math.modf(split_degx[0] * 60)[0] * 60,2))
-
-    # repeat for latitude
-    split_degy = math.modf(latitude)
-    degrees_y = int(split_degy[1])
-    minutes_y = abs(int(math.modf(split_degy[0] * 60)[1]))
-    seconds_y = abs(round(math.modf(split_degy[0] * 60)[0] * 60,2))
-
-    # account for E/W & N/S
-    if longitude < 0:
-        EorW = "W"
-    else:
-        EorW = "E"
-
-    if latitude < 0:
-        NorS = "S"
-    else:
-        NorS = "N"
-
-    # abs() remove negative from degrees, was only needed for if-else above
-    output = (NorS + str(abs(round(degrees_y))).zfill(3) + "." + str(round(minutes_y)).zfill(2) + "." + str(seconds_y).zfill(3) + " " + EorW + str(abs(round(degrees_x))).zfill(3) + "." + str(round(minutes_x)).zfill(2) + "." + str(seconds_x).zfill(3))
-    return output
-
-def dms2dd(lat, lon, ns, ew):
-    lat_split = split_single(lat)
-    lon_split = split_single(lon)
-
-    lat_dd = lat_split[0] + lat_split[1]
-    lat_mm = lat_split[2] + lat_split[3]
-    lat_ss = lat_split[4] + lat_split[5]
-
-    # lat N or S (+/-) lon E or W (+/-)
-
-    lat_out = int(lat_dd) + int(lat_mm) / 60 + int(lat_ss) / 3600
-
-    lon_dd = lon_split[0] + lon_split[1] + lon_split[2]
-    lon_mm = lon_split[3] + lon_split[4]
-    lon_ss = lon_split[5] + lon_split[6]
-
-    lon_out = int(lon_dd) + int(lon_mm) / 60 + int(lon_ss) / 3600
-
-    if ns == "S":
-        lat_out = lat_out - (lat_out * 2)
-    if ew == "W":
-        lon_out = lon_out - (lon_out * 2)
-
-    return [lat_out, lon_out]
-
-def split_single(word):
-    return [char for char in str(word)]
-
-def split(word):
-        return [char for char in word]
-
-def sct_location_builder(lat, lon, lat_ns, lon_ew):
-    """Returns an SCT file compliant location"""
-    lat_split = split(lat) # split the lat into individual digits
-    if len(lat_split) > 6:
-        lat_print = f"{lat_ns}{lat_split[0]}{lat_split[1]}.{lat_split[2]}{lat_split[3]}.{lat_split[4]}{lat_split[5]}.{lat_split[7]}{lat_split[8]}"
-    else:
-        lat_print = f"{lat_ns}{lat_split[0]}{lat_split[1]}.{lat_split[2]}{lat_split[3]}.{lat_split[4]}{lat_split[5]}.00"
-
-    lon_split = split(lon)
-    if len(lon_split) > 7:
-        lon_print = f"{lon_ew}{lon_split[0]}{lon_split[1]}{lon_split[2]}.{lon_split[3]}{lon_split[4]}.{lon_split[5]}{lon_split[6]}.{lon_split[8]}{lon_split[9]}"
-    else:
-        lon_print = f"{lon_ew}{lon_split[0]}{lon_split[1]}{lon_split[2]}.{lon_split[3]}{lon_split[4]}.{lon_split[5]}{lon_split[6]}.00"
-
-    fullLocation = f"{lat_print} {lon_print}" # AD-2.2 gives aerodrome location as DDMMSS / DDDMMSS
-
-    return fullLocation
-
 def getBoundary(space, name=0):
     """creates a boundary useable in vatSys from AIRAC data"""
     lat = True